@@ -0,0 +1,72 @@
+import sys
+import json
+import argparse
+from benchmark import DISTRIBUTIONS, PHASES, run_benchmarks
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time each phase of the voting pipeline on synthetic ballots"
+    )
+    parser.add_argument(
+        "-b",
+        "--ballots",
+        help="ballot counts to benchmark",
+        type=int,
+        nargs="+",
+        default=[1000, 10000],
+    )
+    parser.add_argument(
+        "-c",
+        "--movies",
+        help="movie counts to benchmark",
+        type=int,
+        nargs="+",
+        default=[10, 40],
+    )
+    parser.add_argument(
+        "-D",
+        "--distribution",
+        help="how synthetic ballots are drawn",
+        choices=DISTRIBUTIONS,
+        default="impartial",
+    )
+    parser.add_argument(
+        "--dispersion", help="mallows dispersion (0-1)", type=float, default=0.5
+    )
+    parser.add_argument(
+        "-r", "--repeat", help="timed runs per grid point", type=int, default=3
+    )
+    parser.add_argument("--seed", help="random seed", type=int, default=0)
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="write JSON results to this file instead of the terminal",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.ballots,
+        args.movies,
+        distribution=args.distribution,
+        repeat=args.repeat,
+        seed=args.seed,
+        dispersion=args.dispersion,
+    )
+
+    for result in results:
+        timings = "  ".join(f"{p}={result['best'][p] * 1000:.1f}ms" for p in PHASES)
+        print(
+            f"{result['movies']:>4} movies {result['ballots']:>8} ballots  {timings}",
+            file=sys.stderr,
+        )
+    report = json.dumps({"phases": PHASES, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outfile:
+            outfile.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+from .electorate import DISTRIBUTIONS, SyntheticElectorate
+from .runner import PHASES, run_benchmarks, time_phases
+
+__all__ = [
+    "DISTRIBUTIONS",
+    "PHASES",
+    "SyntheticElectorate",
+    "run_benchmarks",
+    "time_phases",
+]
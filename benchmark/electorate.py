@@ -0,0 +1,107 @@
+import io
+import csv
+import random
+from zipfile import ZipFile, ZIP_DEFLATED
+from domain import Ballot
+
+DISTRIBUTIONS = ("impartial", "mallows", "truncated")
+
+
+class SyntheticElectorate:
+    """
+    Seeded generator of synthetic movie ballots.
+
+    Distributions:
+        - impartial: every ranking of the movies is equally likely
+        - mallows: rankings cluster around a reference order, with dispersion
+          between 0 (everyone agrees) and 1 (impartial culture)
+        - truncated: impartial rankings where each voter only ranks their top
+          min_ranked to max_ranked movies, leaving the rest blank
+
+    Attributes:
+        num_movies (int): Number of candidate movies
+        movies (list): Generated movie titles
+        seed (int): Seed for the random number generator
+    """
+
+    def __init__(self, num_movies, seed=0):
+        self.num_movies = num_movies
+        self.movies = [f"Movie {i + 1:03}" for i in range(num_movies)]
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+    def _impartial_order(self):
+        order = list(range(self.num_movies))
+        self.rng.shuffle(order)
+        return order
+
+    def _mallows_order(self, dispersion, reference):
+        # Repeated insertion: the i-th reference movie lands j places above the
+        # bottom of the partial order with probability proportional to dispersion^j
+        order = []
+        for i, movie in enumerate(reference):
+            weights = [dispersion**j for j in range(i + 1)]
+            shift = self.rng.choices(range(i + 1), weights=weights)[0]
+            order.insert(i - shift, movie)
+        return order
+
+    def rankings(self, distribution, num_ballots, **options):
+        """
+        Generate rank vectors in ballot form (rank per movie, -1 when unranked).
+
+        Args:
+            distribution (str): One of DISTRIBUTIONS
+            num_ballots (int): Number of ballots to generate
+            **options:
+                dispersion (float): Mallows dispersion, default 0.5
+                reference (list): Mallows reference order, default movie order
+                min_ranked (int): Fewest movies ranked on a truncated ballot
+                max_ranked (int): Most movies ranked on a truncated ballot
+
+        Returns:
+            list: One list of ranks per ballot
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution: {distribution}")
+        dispersion = options.get("dispersion", 0.5)
+        reference = options.get("reference", list(range(self.num_movies)))
+        min_ranked = min(options.get("min_ranked", 3), self.num_movies)
+        max_ranked = min(options.get("max_ranked", 5), self.num_movies)
+
+        rankings = []
+        for _ in range(num_ballots):
+            if distribution == "mallows":
+                order = self._mallows_order(dispersion, reference)
+            else:
+                order = self._impartial_order()
+            if distribution == "truncated":
+                order = order[: self.rng.randint(min_ranked, max_ranked)]
+            votes = [-1] * self.num_movies
+            for rank, movie in enumerate(order):
+                votes[movie] = rank + 1
+            rankings.append(votes)
+        return rankings
+
+    def ballots(self, distribution, num_ballots, **options):
+        """Generate a list of Ballot objects; see rankings() for the options."""
+        return [
+            Ballot(votes)
+            for votes in self.rankings(distribution, num_ballots, **options)
+        ]
+
+    def write_export(self, path, distribution, num_ballots, **options):
+        """
+        Write ballots as a Google Forms style .csv.zip export.
+
+        The header holds a timestamp column followed by one "[title]" column per
+        movie, and blank cells mark unranked movies, matching the real exports.
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["Timestamp"] + [f"Rank the movies [{m}]" for m in self.movies])
+        for i, votes in enumerate(self.rankings(distribution, num_ballots, **options)):
+            timestamp = f"2025/01/01 {i // 3600 % 24:02}:{i // 60 % 60:02}:{i % 60:02}"
+            writer.writerow([timestamp] + [str(v) if v != -1 else "" for v in votes])
+        with ZipFile(path, "w", ZIP_DEFLATED) as zipfile:
+            zipfile.writestr("Runoff Votes.csv", buffer.getvalue())
+        return path
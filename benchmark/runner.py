@@ -0,0 +1,87 @@
+import os
+import time
+import hashlib
+import tempfile
+from domain import BallotMatrix, parse_file
+from methods import InstantRunoffMethod, SchulzeMethod
+from methods.pairwise import PairwiseMatrix
+from .electorate import SyntheticElectorate
+
+PHASES = ("parse", "load", "score_pairwise", "compute_paths", "irv")
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def time_phases(export_path):
+    """Run every phase once on an export, returning {phase: seconds}."""
+    timings = {}
+    file_contents, timings["parse"] = _timed(lambda: parse_file(export_path))
+    ballots, timings["load"] = _timed(
+        lambda: BallotMatrix.from_file_contents(file_contents)
+    )
+    # Tallies are shared through a process-wide cache; time a real tally each run
+    PairwiseMatrix.clear_cache()
+    schulze = SchulzeMethod(ballots.movies.copy(), ballots)
+    _, timings["score_pairwise"] = _timed(schulze.score_pairwise)
+    _, timings["compute_paths"] = _timed(schulze.compute_paths)
+    _, timings["irv"] = _timed(
+        lambda: InstantRunoffMethod(ballots.movies.copy(), ballots).process_ballots()
+    )
+    return timings
+
+
+def point_seed(seed, num_ballots, num_movies):
+    """Derive a grid point's seed from the base seed and its size."""
+    key = f"{seed}:{num_ballots}:{num_movies}".encode("utf-8")
+    return int.from_bytes(hashlib.sha256(key).digest()[:4], "little")
+
+
+def run_benchmarks(
+    ballot_counts, movie_counts, distribution="impartial", repeat=3, seed=0, **options
+):
+    """
+    Time each phase across a grid of ballot and movie counts.
+
+    Each grid point gets its own seeded export, written to a temporary directory,
+    and is timed repeat times.
+
+    Args:
+        ballot_counts (list): Numbers of ballots to generate
+        movie_counts (list): Numbers of candidate movies to generate
+        distribution (str): Ballot distribution, see SyntheticElectorate
+        repeat (int): Timed runs per grid point
+        seed (int): Base seed; each grid point derives its own from it
+        **options: Distribution options passed to SyntheticElectorate.rankings
+
+    Returns:
+        list: One dict per grid point with the best and mean time of each phase
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for num_movies in movie_counts:
+            for num_ballots in ballot_counts:
+                electorate = SyntheticElectorate(
+                    num_movies, seed=point_seed(seed, num_ballots, num_movies)
+                )
+                export_path = electorate.write_export(
+                    os.path.join(workdir, f"{num_movies}x{num_ballots}.csv.zip"),
+                    distribution,
+                    num_ballots,
+                    **options,
+                )
+                runs = [time_phases(export_path) for _ in range(repeat)]
+                results.append(
+                    {
+                        "distribution": distribution,
+                        "ballots": num_ballots,
+                        "movies": num_movies,
+                        "seed": electorate.seed,
+                        "best": {p: min(r[p] for r in runs) for p in PHASES},
+                        "mean": {p: sum(r[p] for r in runs) / repeat for p in PHASES},
+                    }
+                )
+    return results
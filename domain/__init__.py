@@ -1,4 +1,34 @@
 from .ballot import Ballot
-from .file_utils import acquire_file, parse_file
+from .ballot_matrix import BallotMatrix, as_ballot_matrix
+from .ballot_file import BALLOT_FILE_SUFFIX, read_ballot_file, write_ballot_file
+from .file_utils import (
+    acquire_file,
+    export_size,
+    find_files,
+    parse_file,
+    stream_file,
+)
+from .parse_cache import ParseCache
+from .profiling import NULL_PROFILER, NullProfiler, Profiler
+from .sparse_ballots import SparseBallots
+from .title_index import TitleIndex
 
-__all__ = ["Ballot", "acquire_file", "parse_file"]
+__all__ = [
+    "BALLOT_FILE_SUFFIX",
+    "Ballot",
+    "BallotMatrix",
+    "NULL_PROFILER",
+    "NullProfiler",
+    "ParseCache",
+    "Profiler",
+    "SparseBallots",
+    "TitleIndex",
+    "as_ballot_matrix",
+    "acquire_file",
+    "export_size",
+    "find_files",
+    "parse_file",
+    "read_ballot_file",
+    "stream_file",
+    "write_ballot_file",
+]
@@ -1,6 +1,16 @@
 import re
 
 
+def parse_movie_titles(header):
+    """Extract the bracketed movie titles from a Google Forms header row."""
+    return [re.search(r"\[(.+)\]", movie).group(1) for movie in header[1:]]
+
+
+def parse_votes(row):
+    """Convert a response row into a list of ranks, using -1 for unranked."""
+    return [int(val) if val != "" else -1 for val in row[1:]]
+
+
 class Ballot:
     total_ballots = 0
 
@@ -15,14 +25,10 @@ class Ballot:
     @classmethod
     def load_from_file_contents(cls, file_contents, **kwargs):
         """Load movies and ballots from file contents."""
-        movies = [
-            re.search(r"\[(.+)\]", movie).group(1) for movie in file_contents[0][1:]
-        ]
+        movies = parse_movie_titles(file_contents[0])
 
         ballots = []
         for ballot in list(file_contents[1:]):
-            ballots.append(
-                cls([int(val) if val != "" else -1 for val in ballot[1:]], **kwargs)
-            )
+            ballots.append(cls(parse_votes(ballot), **kwargs))
 
         return movies, ballots
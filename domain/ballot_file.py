@@ -0,0 +1,118 @@
+import os
+import json
+import mmap
+import struct
+from array import array
+from .ballot_matrix import BallotMatrix
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+# File extension for binary ballot files written by elect.py --export-binary.
+BALLOT_FILE_SUFFIX = ".ballots"
+
+_MAGIC = b"MVPC"
+_VERSION = 2
+_PREFIX = struct.Struct("<4sHI")  # magic, version, header length
+_ALIGN = 8
+
+
+def _padding(offset):
+    return -offset % _ALIGN
+
+
+def _rank_bytes(ballots):
+    """Return (typecode, data) for the ranks, narrowed to int8 when they all fit."""
+    if ballots.typecode == "b":
+        return "b", ballots.ranks.tobytes()
+    if np is not None:
+        ranks = np.frombuffer(ballots.ranks, dtype=np.int16)
+        fits = not len(ranks) or (ranks.min() >= -128 and ranks.max() <= 127)
+        return (
+            ("b", ranks.astype(np.int8).tobytes()) if fits else ("h", ranks.tobytes())
+        )
+    ranks = ballots.ranks
+    if not len(ranks) or (min(ranks) >= -128 and max(ranks) <= 127):
+        return "b", array("b", ranks).tobytes()
+    return "h", ranks.tobytes()
+
+
+def write_ballot_file(path, ballots):
+    """
+    Write a BallotMatrix as a binary ballot file.
+
+    The file holds a fixed prefix (magic, version, header length), a JSON header
+    with the movie titles, row count, rank type and whether rows are weighted,
+    then the row-major rank matrix and the optional int64 row weights, each
+    aligned to 8 bytes. Ranks are stored as int8 when they all fit, otherwise
+    int16, so a file can be memory-mapped and used without conversion.
+
+    Args:
+        path (str): File to write; it is replaced atomically
+        ballots (BallotMatrix): Ballots to store
+    """
+    rank_type, data = _rank_bytes(ballots)
+    header = json.dumps(
+        {
+            "movies": ballots.movies,
+            "rows": len(ballots),
+            "rank_type": rank_type,
+            "weighted": ballots.weights is not None,
+        }
+    ).encode()
+    chunks = [
+        _PREFIX.pack(_MAGIC, _VERSION, len(header)),
+        header,
+        bytes(_padding(_PREFIX.size + len(header))),
+        data,
+        bytes(_padding(len(data))),
+    ]
+    if ballots.weights is not None:
+        chunks.append(ballots.weights.tobytes())
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, "wb") as file:
+        for chunk in chunks:
+            file.write(chunk)
+    os.replace(temp_path, path)
+
+
+def read_ballot_file(path):
+    """
+    Load a binary ballot file without copying it.
+
+    Returns:
+        BallotMatrix: A matrix whose buffers are read-only views of the
+            memory-mapped file
+
+    Raises:
+        ValueError: If the file is not a ballot file of this version
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size < _PREFIX.size:
+            raise ValueError(f"{path} is not a ballot file")
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    magic, version, header_length = _PREFIX.unpack_from(view)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(f"{path} is not a version {_VERSION} ballot file")
+    offset = _PREFIX.size
+    header = json.loads(bytes(view[offset : offset + header_length]))
+    offset += header_length
+    offset += _padding(offset)
+
+    rank_type = header["rank_type"]
+    size = header["rows"] * len(header["movies"]) * struct.calcsize(rank_type)
+    ranks = view[offset : offset + size].cast(rank_type)
+    offset += size + _padding(size)
+    weights = None
+    if header["weighted"]:
+        weights = view[offset : offset + header["rows"] * 8].cast(
+            BallotMatrix.weight_typecode
+        )
+    return BallotMatrix(header["movies"], ranks, weights)
@@ -0,0 +1,230 @@
+import json
+import hashlib
+from array import array
+from .ballot import Ballot, parse_movie_titles, parse_votes
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+
+class BallotMatrix:
+    """
+    Columnar ballot store holding every ranking in one contiguous buffer.
+
+    Row b, column i holds the rank ballot b gave to movies[i], or -1 if the movie
+    was left unranked. Ranks are stored as int16 in a single array.array (or as a
+    read-only int8/int16 view of a memory-mapped ballot file), so a
+    copy is one buffer copy and numpy can view the data without converting it.
+
+    A matrix may also carry a weight per row, in which case each row stands for
+    that many identical ballots (see collapse()).
+
+    Attributes:
+        movies (list): Candidate titles, one per column
+        index (dict): Maps each title to its column
+        n (int): Number of candidates/columns
+        ranks (array): Flat row-major B x n buffer of ranks
+        weights (array): Number of ballots each row stands for, or None if 1 each
+    """
+
+    typecode = "h"
+    weight_typecode = "q"
+
+    def __init__(self, movies, ranks=None, weights=None):
+        self.movies = list(movies)
+        self.index = {movie: i for i, movie in enumerate(self.movies)}
+        self.n = len(self.movies)
+        self.ranks = ranks if ranks is not None else array(self.typecode)
+        # Ranks loaded from a binary ballot file may be int8 instead of int16
+        self.typecode = getattr(self.ranks, "typecode", None) or self.ranks.format
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.ranks) // self.n if self.n else 0
+
+    @property
+    def num_ballots(self):
+        """Number of ballots represented, counting each row's weight."""
+        return sum(self.weights) if self.weights is not None else len(self)
+
+    def __iter__(self):
+        return self.rows()
+
+    def __repr__(self) -> str:
+        return f"BallotMatrix[{len(self)} ballots x {self.n} movies]"
+
+    @classmethod
+    def from_file_contents(cls, file_contents):
+        """Load movies and ballots from file contents."""
+        matrix = cls(parse_movie_titles(file_contents[0]))
+        matrix.extend(parse_votes(row) for row in file_contents[1:])
+        return matrix
+
+    @classmethod
+    def from_stream(cls, stream):
+        """Load movies and ballots from a header row followed by chunks of rows.
+
+        Each chunk is converted and appended before the next is read, so only one
+        chunk of text rows is held in memory at a time.
+        """
+        matrix = cls(parse_movie_titles(next(stream)))
+        for chunk in stream:
+            matrix.extend(parse_votes(row) for row in chunk)
+        return matrix
+
+    @classmethod
+    def from_ballots(cls, movies, ballots):
+        """Pack a list of Ballot objects into a new matrix."""
+        matrix = cls(movies)
+        matrix.extend(ballot.votes for ballot in ballots)
+        return matrix
+
+    def append(self, votes):
+        """Add one ballot given as a list of ranks."""
+        if len(votes) != self.n:
+            raise ValueError(f"Expected {self.n} votes per ballot, got {len(votes)}")
+        self.ranks.extend(votes)
+        if self.weights is not None:
+            self.weights.append(1)
+
+    def extend(self, rows):
+        """Add several ballots given as lists of ranks."""
+        for votes in rows:
+            self.append(votes)
+
+    def copy(self):
+        """Return an independent matrix sharing no buffers with this one."""
+        # frombytes only takes unsigned byte buffers, not arrays or typed views
+        ranks = array(self.typecode)
+        ranks.frombytes(memoryview(self.ranks).cast("B"))
+        weights = None
+        if self.weights is not None:
+            weights = array(self.weight_typecode)
+            weights.frombytes(memoryview(self.weights).cast("B"))
+        return BallotMatrix(self.movies, ranks, weights)
+
+    def digest(self):
+        """Return a hex digest of the movies, ranks and weights, for use as a cache key."""
+        digest = hashlib.sha256(json.dumps(self.movies).encode("utf-8"))
+        digest.update(memoryview(self.ranks).cast("B"))
+        if self.weights is not None:
+            digest.update(b"weights")
+            digest.update(memoryview(self.weights).cast("B"))
+        return digest.hexdigest()
+
+    def canonical_digest(self):
+        """
+        Return a hex digest of the movies and the multiset of rankings.
+
+        Unlike digest(), it is the same whatever order the ballots are in, how
+        identical rankings are grouped into weighted rows, and whether ranks are
+        stored as int8 or int16, so it identifies ballot sets that any method
+        tabulates alike.
+        """
+        digest = hashlib.sha256(json.dumps(self.movies).encode("utf-8"))
+        if np is not None:
+            # Same bytes as below: distinct rows in byte order, each followed by
+            # its total weight
+            rows = np.ascontiguousarray(self.to_numpy(), dtype=np.int16)
+            rows = rows.view(np.dtype((np.void, rows.itemsize * self.n))).ravel()
+            keys, inverse = np.unique(rows, return_inverse=True)
+            records = np.empty(
+                len(keys), dtype=[("row", keys.dtype), ("weight", "<i8")]
+            )
+            records["row"] = keys
+            records["weight"] = np.bincount(
+                inverse.ravel(), weights=self.weights_numpy(), minlength=len(keys)
+            )
+            digest.update(records.tobytes())
+            return digest.hexdigest()
+        groups = self.collapse()
+        ranks = groups.ranks
+        if groups.typecode != BallotMatrix.typecode:
+            ranks = array(BallotMatrix.typecode, ranks)
+        data = ranks.tobytes()
+        width = self.n * ranks.itemsize
+        rows = sorted(
+            (data[b * width : (b + 1) * width], groups.weights[b])
+            for b in range(len(groups))
+        )
+        for key, weight in rows:
+            digest.update(key)
+            digest.update(weight.to_bytes(8, "little"))
+        return digest.hexdigest()
+
+    def collapse(self):
+        """
+        Group identical rankings into single weighted rows.
+
+        Rows keep the order in which each distinct ranking first appears, and each
+        row's weight is the total weight of the ballots it replaces, so tallies over
+        the result match tallies over the original ballots.
+
+        Returns:
+            BallotMatrix: A weighted matrix with one row per distinct ranking
+        """
+        groups = {}
+        data = self.ranks.tobytes()
+        width = self.n * self.ranks.itemsize
+        for b in range(len(self)):
+            key = data[b * width : (b + 1) * width]
+            weight = self.weights[b] if self.weights is not None else 1
+            groups[key] = groups.get(key, 0) + weight
+
+        ranks = array(self.typecode)
+        ranks.frombytes(b"".join(groups))
+        weights = array(self.weight_typecode, groups.values())
+        return BallotMatrix(self.movies, ranks, weights)
+
+    def row(self, b):
+        """Return the ranks of ballot b as a list."""
+        return self.ranks[b * self.n : (b + 1) * self.n].tolist()
+
+    def rows(self):
+        """Iterate over every ballot's ranks as lists."""
+        for b in range(len(self)):
+            yield self.row(b)
+
+    def column(self, i):
+        """Return every ballot's rank for movie i as an array."""
+        return self.ranks[i :: self.n]
+
+    def weight(self, b):
+        """Return the number of ballots row b stands for."""
+        return self.weights[b] if self.weights is not None else 1
+
+    def to_ballots(self):
+        """Unpack into a list of Ballot objects, repeating weighted rows."""
+        return [
+            Ballot(votes.copy())
+            for b, votes in enumerate(self.rows())
+            for _ in range(self.weight(b))
+        ]
+
+    def to_numpy(self):
+        """Return a read-only (B x n) numpy view of the rank buffer."""
+        if np is None:
+            raise ImportError("numpy is required for BallotMatrix.to_numpy")
+        view = np.frombuffer(self.ranks, dtype=np.dtype(self.typecode))
+        view = view.reshape(len(self), self.n)
+        view.flags.writeable = False
+        return view
+
+    def weights_numpy(self):
+        """Return the row weights as a numpy array, all ones if unweighted."""
+        if np is None:
+            raise ImportError("numpy is required for BallotMatrix.weights_numpy")
+        if self.weights is None:
+            return np.ones(len(self), dtype=np.int64)
+        view = np.frombuffer(self.weights, dtype=np.int64)
+        view.flags.writeable = False
+        return view
+
+
+def as_ballot_matrix(movies, ballots):
+    """Return ballots as a BallotMatrix, packing Ballot lists if needed."""
+    if isinstance(ballots, BallotMatrix):
+        return ballots
+    return BallotMatrix.from_ballots(movies, ballots)
@@ -2,19 +2,33 @@ import io
 import os
 import csv
 import glob
-import tkinter as tk
+import itertools
 from zipfile import ZipFile
-from tkinter.filedialog import askopenfilename
+
+# Rows handed to the ballot store at a time when streaming an export.
+STREAM_CHUNK_ROWS = 4096
+# Exports whose uncompressed CSV is larger than this are streamed by default.
+STREAM_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+
+def find_files(pattern, path=""):
+    """list every .csv.zip export from Google Forms matching pattern, oldest first."""
+    files = glob.glob(os.path.join(path, f"{pattern}*.csv*.zip"))
+    return sorted(files, key=os.path.getctime)
 
 
 def acquire_file(manual_select, pattern, path=""):
     """select a .csv.zip file from Google Forms either manually, or by creation date."""
     if manual_select is False:
-        files = glob.glob(os.path.join(path, f"{pattern}*.csv*.zip"))
+        files = find_files(pattern, path)
         if not files:
             raise FileNotFoundError(f"No files found in {path}")
-        return max(files, key=os.path.getctime)
+        return files[-1]
     else:
+        # tkinter is slow to import, so only load it when a dialog is needed
+        import tkinter as tk
+        from tkinter.filedialog import askopenfilename
+
         root = tk.Tk()
         root.withdraw()
         return askopenfilename()
@@ -26,3 +40,23 @@ def parse_file(filepath):
         with zipfile.open(zipfile.namelist()[0], "r") as csvfile:
             reader = csv.reader(io.TextIOWrapper(csvfile, "utf-8"))
             return list(reader)
+
+
+def export_size(filepath):
+    """return the uncompressed size in bytes of the csv inside a csv.zip export."""
+    with ZipFile(filepath, "r") as zipfile:
+        return zipfile.getinfo(zipfile.namelist()[0]).file_size
+
+
+def stream_file(filepath, chunk_size=STREAM_CHUNK_ROWS):
+    """yield the header row of a csv.zip export from Google Forms, then lists of
+    up to chunk_size rows, reading straight from the zip member."""
+    with ZipFile(filepath, "r") as zipfile:
+        with zipfile.open(zipfile.namelist()[0], "r") as csvfile:
+            reader = csv.reader(io.TextIOWrapper(csvfile, "utf-8"))
+            header = next(reader, None)
+            if header is None:
+                return
+            yield header
+            while chunk := list(itertools.islice(reader, chunk_size)):
+                yield chunk
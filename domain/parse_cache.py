@@ -0,0 +1,116 @@
+import os
+import json
+import hashlib
+from .ballot_file import read_ballot_file, write_ballot_file
+
+# Cache directory created in the working directory by elect.py and suggest.py.
+PARSE_CACHE_DIR = ".parse_cache"
+# Total size the cache directory may grow to before old entries are evicted.
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed Google Forms exports.
+
+    Entries are keyed by the export's path, size, modification time and a hash of
+    its contents. Ballot exports are stored as binary ballot files (see
+    domain.ballot_file), which later runs memory-map instead of unzipping and
+    parsing the CSV again. Other exports (e.g. suggestions) are stored as JSON rows.
+
+    When the directory grows past max_bytes the least recently used entries are
+    removed.
+
+    Attributes:
+        directory (str): Where cache entries are written
+        max_bytes (int): Size limit for the whole cache directory
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._keys = {}
+
+    def key(self, filepath):
+        """Return the cache key for an export file."""
+        filepath = os.path.abspath(filepath)
+        stat = os.stat(filepath)
+        signature = (filepath, stat.st_size, stat.st_mtime_ns)
+        if signature not in self._keys:
+            content = hashlib.sha256()
+            with open(filepath, "rb") as file:
+                for block in iter(lambda: file.read(1 << 20), b""):
+                    content.update(block)
+            digest = hashlib.sha256(repr(signature).encode())
+            digest.update(content.digest())
+            self._keys[signature] = digest.hexdigest()
+        return self._keys[signature]
+
+    def _path(self, filepath, suffix):
+        return os.path.join(self.directory, f"{self.key(filepath)}.{suffix}")
+
+    def _hit(self, path):
+        if not os.path.exists(path):
+            return False
+        os.utime(path)  # Mark as recently used for eviction
+        return True
+
+    def _write(self, path, chunks):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path}.tmp{os.getpid()}"
+        with open(temp_path, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def load_ballots(self, filepath):
+        """
+        Return the cached BallotMatrix for an export, or None on a miss.
+
+        The returned matrix's buffers are read-only views of a memory-mapped file.
+        """
+        path = self._path(filepath, "ballots")
+        if not self._hit(path):
+            return None
+        try:
+            return read_ballot_file(path)
+        except ValueError:
+            return None  # Written by an older version; parse the export again
+
+    def store_ballots(self, filepath, ballots):
+        """Write a BallotMatrix to the cache for an export."""
+        write_ballot_file(self._path(filepath, "ballots"), ballots)
+        self.evict()
+
+    def load_rows(self, filepath):
+        """Return the cached parsed rows of an export, or None on a miss."""
+        path = self._path(filepath, "rows.json")
+        if not self._hit(path):
+            return None
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def store_rows(self, filepath, rows):
+        """Write the parsed rows of an export to the cache."""
+        data = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+        self._write(self._path(filepath, "rows.json"), [data])
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Evicted by another process, e.g. a --batch worker
+            total -= size
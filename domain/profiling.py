@@ -0,0 +1,120 @@
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Profiler:
+    """
+    Records wall time, memory use and iteration counts for named phases.
+
+    Phases may be nested; each record keeps the name of its parent. Memory is
+    measured with tracemalloc (peak traced bytes during the phase) and with the
+    change in the interpreter's allocated block count.
+
+    Attributes:
+        records (list): One dict per finished phase, in the order they started
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+        # Only stop tracing in stop() if it was not already on
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name, **info):
+        """
+        Time a phase of work.
+
+        Args:
+            name (str): Phase name, e.g. "score_pairwise"
+            **info: Extra values stored on the record, e.g. round=3
+
+        Yields:
+            dict: The phase's record, so callers can add counts while it runs
+        """
+        record = {
+            "name": name,
+            "parent": self._stack[-1]["name"] if self._stack else None,
+        }
+        record.update(info)
+        record["counts"] = {}
+        self.records.append(record)
+        if self.trace_memory and self._stack:
+            parent = self._stack[-1]
+            parent["peak_bytes"] = max(parent["peak_bytes"], self._peak())
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            record["peak_bytes"] = 0
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start_blocks = sys.getallocatedblocks()
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            record["allocated_blocks"] = sys.getallocatedblocks() - start_blocks
+            self._stack.pop()
+            if self.trace_memory:
+                record["peak_bytes"] = max(record["peak_bytes"], self._peak())
+                record["peak_bytes"] -= start_memory
+                record["retained_bytes"] = (
+                    tracemalloc.get_traced_memory()[0] - start_memory
+                )
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent["peak_bytes"] = max(
+                        parent["peak_bytes"], record["peak_bytes"] + start_memory
+                    )
+
+    @staticmethod
+    def _peak():
+        return tracemalloc.get_traced_memory()[1]
+
+    def count(self, name, amount=1):
+        """Add to a named iteration counter on the innermost running phase."""
+        if self._stack:
+            counts = self._stack[-1]["counts"]
+            counts[name] = counts.get(name, 0) + amount
+
+    def report(self):
+        """Return every record along with total time per phase name."""
+        totals = {}
+        for record in self.records:
+            totals[record["name"]] = totals.get(record["name"], 0) + record["seconds"]
+        return {"phases": self.records, "totals": totals}
+
+    def write(self, path):
+        """Write the report as JSON."""
+        with open(path, "w", encoding="utf-8") as outfile:
+            json.dump(self.report(), outfile, indent=2)
+
+    def stop(self):
+        """Stop tracing memory if this profiler started it."""
+        if self.started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self.started_tracing = False
+
+
+class NullProfiler:
+    """Profiler stand-in that records nothing, used when profiling is off."""
+
+    enabled = False
+
+    @contextmanager
+    def phase(self, name, **info):
+        yield {}
+
+    def count(self, name, amount=1):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
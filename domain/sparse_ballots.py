@@ -0,0 +1,95 @@
+from array import array
+from .ballot_matrix import BallotMatrix
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+
+class SparseBallots:
+    """
+    Ballots stored as only their ranked (column, rank) entries.
+
+    Entries of ballot b are columns[offsets[b]:offsets[b + 1]] with the matching
+    ranks, so a ballot that ranks k of n movies takes O(k) space instead of O(n).
+    This suits truncated ballots, where most voters rank only their top few
+    movies and leave the rest unranked.
+
+    Attributes:
+        movies (list): Candidate titles
+        n (int): Number of candidates
+        offsets (array): Start of each ballot's entries, plus the total at the end
+        columns (array): Column of each entry
+        ranks (array): Rank of each entry
+        weights (array): Number of ballots each row stands for, or None if 1 each
+    """
+
+    def __init__(self, movies, offsets, columns, ranks, weights=None):
+        self.movies = list(movies)
+        self.n = len(self.movies)
+        self.offsets = offsets
+        self.columns = columns
+        self.ranks = ranks
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __repr__(self) -> str:
+        return f"SparseBallots[{len(self)} ballots, {len(self.columns)} ranks]"
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """Keep only the ranked entries of a BallotMatrix."""
+        offsets = array("q", [0])
+        columns = array(BallotMatrix.typecode)
+        ranks = array(BallotMatrix.typecode)
+        if np is not None:
+            dense = matrix.to_numpy()
+            rows, cols = np.nonzero(dense != -1)
+            counts = np.bincount(rows, minlength=len(matrix))
+            offsets.frombytes(np.cumsum(counts, dtype=np.int64).tobytes())
+            columns.frombytes(cols.astype(np.int16).tobytes())
+            ranks.frombytes(dense[rows, cols].astype(np.int16).tobytes())
+        else:
+            for votes in matrix.rows():
+                for col, vote in enumerate(votes):
+                    if vote != -1:
+                        columns.append(col)
+                        ranks.append(vote)
+                offsets.append(len(columns))
+        return cls(matrix.movies, offsets, columns, ranks, matrix.weights)
+
+    def density(self):
+        """Return the fraction of (ballot, movie) cells that are ranked."""
+        cells = len(self) * self.n
+        return len(self.columns) / cells if cells else 0.0
+
+    def entries(self, b):
+        """Return ballot b's ranked entries as (column, rank) pairs."""
+        start, stop = self.offsets[b], self.offsets[b + 1]
+        return list(zip(self.columns[start:stop], self.ranks[start:stop]))
+
+    def weight(self, b):
+        """Return the number of ballots row b stands for."""
+        return self.weights[b] if self.weights is not None else 1
+
+    def weights_numpy(self):
+        """Return the row weights as a numpy array, all ones if unweighted."""
+        if np is None:
+            raise ImportError("numpy is required for SparseBallots.weights_numpy")
+        if self.weights is None:
+            return np.ones(len(self), dtype=np.int64)
+        return np.frombuffer(self.weights, dtype=np.int64)
+
+
+def ranked_density(matrix):
+    """Return the fraction of a BallotMatrix's cells that are ranked."""
+    cells = len(matrix) * matrix.n
+    if not cells:
+        return 0.0
+    if np is not None:
+        return np.count_nonzero(matrix.to_numpy() != -1) / cells
+    ranks = matrix.ranks if isinstance(matrix.ranks, array) else matrix.ranks.tolist()
+    return 1 - ranks.count(-1) / cells
@@ -0,0 +1,191 @@
+import os
+import re
+import json
+import hashlib
+import unicodedata
+from .file_utils import parse_file
+
+# Index file created in the working directory by suggest.py.
+TITLE_INDEX_FILE = ".title_index.json"
+# Smallest similarity (0-1) at which two titles are reported as duplicates.
+DUPLICATE_THRESHOLD = 0.7
+
+_ARTICLES = ("the ", "a ", "an ")
+_YEAR = re.compile(r"\((\d{4})\)")
+_TRAILING_ARTICLE = re.compile(r"^(.*),\s*(the|a|an)$", re.IGNORECASE)
+
+
+def normalize_title(title):
+    """Lowercase a title and strip accents, punctuation and a leading article."""
+    title = _TRAILING_ARTICLE.sub(r"\2 \1", _YEAR.sub(" ", title).strip())
+    title = unicodedata.normalize("NFKD", title)
+    title = "".join(c for c in title if not unicodedata.combining(c)).lower()
+    title = " ".join(re.sub(r"[^\w\s]", " ", title.replace("&", " and ")).split())
+    for article in _ARTICLES:
+        if title.startswith(article):
+            return title[len(article) :]
+    return title
+
+
+def title_grams(title, size=3):
+    """Return the set of character n-grams of a normalized title, padded by spaces."""
+    padded = f"  {title} "
+    return {padded[i : i + size] for i in range(len(padded) - size + 1)}
+
+
+def _rows_digest(rows):
+    """Return a hex digest of export rows, to tell whether they were edited."""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update("\x1f".join(row).encode("utf-8") + b"\x1e")
+    return digest.hexdigest()
+
+
+def _parse_year(value):
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+class TitleIndex:
+    """
+    Persistent index of previously suggested movie titles.
+
+    Titles are normalized and split into character trigrams, and an inverted
+    index maps each trigram to the titles containing it, so a lookup only visits
+    titles that share at least one trigram with the query instead of comparing
+    against every past suggestion. Similarity is the Dice coefficient of the two
+    trigram sets; titles whose known years differ by more than one are never
+    reported, so remakes are not flagged.
+
+    The index is stored as JSON (titles and the exports they came from) and
+    update() only reads exports, or rows of exports, it has not seen before.
+
+    Attributes:
+        path (str): JSON file the index is saved to
+        entries (list): [title, year, source] for every indexed suggestion
+        sources (dict): Export file name -> {"size", "mtime_ns", "rows", "digest"}
+            indexed, where digest is a hash of the indexed rows
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = []
+        self.sources = {}
+        self.postings = {}
+        self.grams = []
+
+    @classmethod
+    def load(cls, path):
+        """Load an index from path, or return an empty one if it does not exist."""
+        index = cls(path)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            index.sources = data["sources"]
+            for title, year, source in data["entries"]:
+                index.add(title, year, source)
+        return index
+
+    def save(self):
+        """Write the index to its path."""
+        temp_path = f"{self.path}.tmp{os.getpid()}"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"sources": self.sources, "entries": self.entries},
+                file,
+                ensure_ascii=False,
+            )
+        os.replace(temp_path, self.path)
+
+    def add(self, title, year=None, source=None):
+        """Index one suggested title."""
+        match = _YEAR.search(title)
+        if year is None and match:
+            year = int(match.group(1))
+        entry = len(self.entries)
+        grams = title_grams(normalize_title(title))
+        self.entries.append([title, year, source])
+        self.grams.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(entry)
+
+    def _drop_source(self, source):
+        kept = [entry for entry in self.entries if entry[2] != source]
+        self.entries, self.grams, self.postings = [], [], {}
+        for title, year, entry_source in kept:
+            self.add(title, year, entry_source)
+
+    def update(self, filepaths):
+        """
+        Index the rows of suggestion exports that are not already indexed.
+
+        Unchanged exports are skipped without being read. Exports whose earlier
+        rows still hash the same only have their new rows added; any other change,
+        e.g. an edited row, re-indexes the export.
+
+        Returns:
+            int: Number of titles added
+        """
+        added = 0
+        for filepath in filepaths:
+            source = os.path.basename(filepath)
+            stat = os.stat(filepath)
+            seen = self.sources.get(source)
+            if seen and (seen["size"], seen["mtime_ns"]) == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                continue
+            rows = parse_file(filepath)[1:]
+            start = seen["rows"] if seen else 0
+            if start and (
+                start > len(rows) or _rows_digest(rows[:start]) != seen.get("digest")
+            ):
+                self._drop_source(source)
+                start = 0
+            for row in rows[start:]:
+                if len(row) > 4 and row[1].strip():
+                    self.add(row[1].strip(), _parse_year(row[4]), source)
+                    added += 1
+            self.sources[source] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "rows": len(rows),
+                "digest": _rows_digest(rows),
+            }
+        return added
+
+    def lookup(self, title, year=None, threshold=DUPLICATE_THRESHOLD, exclude=()):
+        """
+        Find indexed titles similar to title.
+
+        Args:
+            title (str): Title to look up
+            year (int): Release year, if known
+            threshold (float): Smallest similarity to report
+            exclude (tuple): Export file names whose titles are ignored
+
+        Returns:
+            list: (similarity, title, year, source) tuples, most similar first
+        """
+        grams = title_grams(normalize_title(title))
+        shared = {}
+        for gram in grams:
+            for entry in self.postings.get(gram, ()):
+                shared[entry] = shared.get(entry, 0) + 1
+        matches = []
+        for entry, count in shared.items():
+            similarity = 2 * count / (len(grams) + self.grams[entry])
+            if similarity < threshold:
+                continue
+            match_title, match_year, source = self.entries[entry]
+            if source in exclude:
+                continue
+            if year is not None and match_year is not None:
+                if abs(year - match_year) > 1:
+                    continue
+            matches.append((similarity, match_title, match_year, source))
+        matches.sort(key=lambda match: -match[0])
+        return matches
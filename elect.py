@@ -1,13 +1,104 @@
 import os
+import sys
+import csv
+import json
+import time
+import hashlib
 import argparse
-from methods import VotingMethodFactory
-from domain import Ballot, acquire_file, parse_file
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from methods import AuditExporter, BootstrapAnalysis, VotingMethodFactory
+from methods.audit import AUDIT_FORMATS
+from methods.pairwise import PairwiseMatrix, tally_pairwise
+from methods.result_cache import RESULT_CACHE_DIR, ResultCache
+from domain import (
+    BALLOT_FILE_SUFFIX,
+    NULL_PROFILER,
+    BallotMatrix,
+    ParseCache,
+    Profiler,
+    acquire_file,
+    export_size,
+    find_files,
+    parse_file,
+    read_ballot_file,
+    stream_file,
+    write_ballot_file,
+)
+from domain.ballot import parse_movie_titles, parse_votes
+from domain.file_utils import STREAM_THRESHOLD_BYTES
+from domain.parse_cache import PARSE_CACHE_DIR
+
+
+def load_ballots(filepath, stream=None, cache=None, profiler=NULL_PROFILER):
+    """Read an export, returning (file_contents, ballots).
+
+    file_contents is None when the export was streamed, which happens by default
+    for exports larger than STREAM_THRESHOLD_BYTES, or loaded from the cache or
+    from a binary ballot file (BALLOT_FILE_SUFFIX), which is memory-mapped.
+    """
+    if filepath.endswith(BALLOT_FILE_SUFFIX):
+        with profiler.phase("read_ballot_file"):
+            return None, read_ballot_file(filepath)
+    if cache is not None:
+        with profiler.phase("cache_load"):
+            ballots = cache.load_ballots(filepath)
+        if ballots is None:
+            file_contents, ballots = load_ballots(filepath, stream, profiler=profiler)
+            with profiler.phase("cache_store"):
+                cache.store_ballots(filepath, ballots)
+            return file_contents, ballots
+        return None, ballots
+    if stream is None:
+        stream = export_size(filepath) > STREAM_THRESHOLD_BYTES
+    if stream:
+        # Large exports go straight into the ballot store without a text copy
+        with profiler.phase("stream") as record:
+            ballots = BallotMatrix.from_stream(stream_file(filepath))
+            record["rows"] = len(ballots)
+        return None, ballots
+    with profiler.phase("parse"):
+        file_contents = parse_file(filepath)
+    with profiler.phase("load") as record:
+        ballots = BallotMatrix.from_file_contents(file_contents)
+        record["rows"] = len(ballots)
+    return file_contents, ballots
+
+
+def format_placings(winners, losers, show_losers=True):
+    """Flatten method results into display lines, one per placing."""
+    lines = []
+    for winner in winners:
+        if isinstance(winner, list):
+            lines.append(f"{', '.join(winner)}*")
+        else:
+            lines.append(winner)
+    if show_losers:
+        for loser in losers:
+            if isinstance(loser, list):
+                lines.append(f"({', '.join(loser)}* (tied))")
+            else:
+                lines.append(f"({loser})")
+    return lines
 
 
 class Election:
     def __init__(self, filepath, **kwargs):
-        self.file_contents = parse_file(filepath)
-        self.movies, self.ballots = Ballot.load_from_file_contents(self.file_contents)
+        self._setup(**kwargs)
+        self.file_contents, self.ballots = load_ballots(
+            filepath, kwargs.get("stream"), kwargs.get("cache"), self.profiler
+        )
+        self.movies = self.ballots.movies
+        print(f"~~~~~ Using {self.method_str.title()} Method ~~~~~")
+        if self.result_cache is None:
+            self._create_method()
+
+    def _setup(self, **kwargs):
+        """Set the options and empty results shared by every kind of election."""
+        self.profiler = kwargs.get("profiler") or NULL_PROFILER
+        self.file_contents = None
+        self.ballots = None
+        self.movies = []
         self.quiet = kwargs.get("quiet", False)
         self.tie = False
         self.method_str = kwargs.get("method", "schulze")
@@ -17,18 +108,55 @@ class Election:
         self.debug = kwargs.get("debug", False)
         self.winners = []
         self.losers = []
-        print(f"~~~~~ Using {self.method_str.title()} Method ~~~~~")
+        self.workers = kwargs.get("workers")
+        # With a ResultCache, the method is only created if its result is not cached
+        self.result_cache = kwargs.get("result_cache")
+        self.debug_text = None
+        self.voting_method = None
+
+    def _create_method(self):
         self.voting_method = VotingMethodFactory.create_method(
             self.method_str,
             self.movies.copy(),
             self.ballots,
             num_winners=self.num_winners,
+            profiler=self.profiler,
+            workers=self.workers,
         )
 
     def calculate(self):
-        self.winners, self.losers = self.voting_method.process_ballots()
+        key = None
+        if self.result_cache is not None:
+            with self.profiler.phase("result_cache_load"):
+                key = self.result_cache.key(
+                    self.ballots.canonical_digest(),
+                    self.method_str,
+                    num_winners=self.num_winners,
+                )
+                result = self.result_cache.get(key)
+            if result is not None:
+                self.winners, self.losers = result["winners"], result["losers"]
+                self.tie = result["tie"]
+                self.debug_text = result["debug"]
+                self.processed = True
+                return
+        if self.voting_method is None:
+            self._create_method()
+        with self.profiler.phase("process_ballots", method=self.method_str):
+            self.winners, self.losers = self.voting_method.process_ballots()
         self.tie = getattr(self.voting_method, "tie", False)
+        self.debug_text = None
         self.processed = True
+        if key is not None:
+            self.result_cache.put(
+                key,
+                {
+                    "winners": self.winners,
+                    "losers": self.losers,
+                    "tie": self.tie,
+                    "debug": self.voting_method.get_debug(),
+                },
+            )
 
     def display_results(self):
         # Print results
@@ -52,7 +180,345 @@ class Election:
                     print(f"{' ':>8}{loser}")
         print()
         if self.debug:
-            print(self.voting_method.get_debug())
+            if self.debug_text is not None:
+                print(self.debug_text)
+            else:
+                print(self.voting_method.get_debug())
+
+
+def _row_key(row):
+    return "\x1f".join(row).encode("utf-8") + b"\x1e"
+
+
+class ElectionWatcher(Election):
+    """
+    Re-tabulate an election whenever a newer or larger export appears.
+
+    Google Forms exports only ever grow, so each export read is checked against
+    a hash of the rows already counted (each row includes its response
+    timestamp). If the earlier rows are unchanged, only the new rows are
+    converted to ballots: methods with add_ballots (Schulze) tally just those
+    ballots, and other methods are rerun on the extended ballot matrix. If
+    the earlier rows changed, e.g. a response was deleted, everything is
+    counted again.
+    """
+
+    def __init__(self, ballots_dir, **kwargs):
+        self._setup(**kwargs)
+        self.result_cache = None  # Results are updated incrementally instead
+        self.ballots_dir = ballots_dir
+        self.interval = kwargs.get("watch") or 5.0
+        self.signature = None  # (path, size, mtime) of the last export read
+        self.header = None
+        self.seen = 0  # Rows counted so far
+        self.prefix = hashlib.sha256()  # Hash of the rows counted so far
+        print(
+            f"~~~~~ Watching {ballots_dir} with {self.method_str.title()} Method ~~~~~"
+        )
+
+    def refresh(self):
+        """
+        Count the rows added since the last refresh.
+
+        Returns:
+            int: Number of new ballots, or None if no export has changed
+        """
+        filepath = acquire_file(False, "Runoff Votes", path=self.ballots_dir)
+        stat = os.stat(filepath)
+        signature = (filepath, stat.st_size, stat.st_mtime_ns)
+        if signature == self.signature:
+            return None
+        self.signature = signature
+
+        stream = stream_file(filepath)
+        header = next(stream, None)
+        if header is None:
+            return None
+        rows = [row for chunk in stream for row in chunk]
+        unchanged = header == self.header and len(rows) >= self.seen
+        if unchanged:
+            check = hashlib.sha256()
+            for row in rows[: self.seen]:
+                check.update(_row_key(row))
+            unchanged = check.digest() == self.prefix.digest()
+
+        if not unchanged:
+            self.header = header
+            self.movies = parse_movie_titles(header)
+            self.ballots = BallotMatrix(self.movies)
+            self.prefix = hashlib.sha256()
+            self.seen = 0
+            self.voting_method = None
+
+        new_rows = rows[self.seen :]
+        new_ballots = BallotMatrix(self.movies)
+        new_ballots.extend(parse_votes(row) for row in new_rows)
+        for row in new_rows:
+            self.prefix.update(_row_key(row))
+        self.seen = len(rows)
+        self.ballots.extend(new_ballots.rows())
+
+        if self.voting_method is not None and hasattr(
+            self.voting_method, "add_ballots"
+        ):
+            self.voting_method.add_ballots(new_ballots)
+        else:
+            self._create_method()
+        return len(new_ballots)
+
+    def watch(self):
+        """Poll the ballots folder, printing new results whenever votes arrive."""
+        while True:
+            new = self.refresh()
+            if new is not None:
+                stamp = time.strftime("%H:%M:%S")
+                print(f"[{stamp}] {len(self.ballots)} ballots ({new} new)")
+                self.calculate()
+                self.display_results()
+            time.sleep(self.interval)
+
+
+_shared_ballots = None
+
+
+def _init_comparison_worker(ballots, d):
+    global _shared_ballots
+    _shared_ballots = ballots
+    if d is not None:
+        # Every pairwise method in this worker reuses the parent's tally
+        PairwiseMatrix.remember(ballots, d)
+
+
+def _run_comparison_method(method_str, num_winners):
+    method = VotingMethodFactory.create_method(
+        method_str,
+        _shared_ballots.movies.copy(),
+        _shared_ballots,
+        num_winners=num_winners,
+        workers=1,  # Methods already run in parallel
+    )
+    winners, losers = method.process_ballots()
+    return winners, losers, getattr(method, "tie", False), method.get_debug()
+
+
+class ElectionComparison:
+    """Run several voting methods on one parsed export, one process per method."""
+
+    def __init__(self, filepath, method_strs, **kwargs):
+        self.profiler = kwargs.get("profiler") or NULL_PROFILER
+        self.file_contents, self.ballots = load_ballots(
+            filepath, kwargs.get("stream"), kwargs.get("cache"), self.profiler
+        )
+        self.movies = self.ballots.movies
+        self.method_strs = list(dict.fromkeys(method_strs))
+        self.num_winners = kwargs.get("num_winners", 1)
+        self.show_losers = kwargs.get("show_losers", True)
+        self.result_cache = kwargs.get("result_cache")
+        self.results = {}
+        print(f"~~~~~ Comparing {', '.join(m.title() for m in self.method_strs)} ~~~~~")
+
+    def calculate(self):
+        keys = {}
+        cached = {}
+        if self.result_cache is not None:
+            with self.profiler.phase("result_cache_load"):
+                digest = self.ballots.canonical_digest()
+                for method_str in self.method_strs:
+                    keys[method_str] = self.result_cache.key(
+                        digest, method_str, num_winners=self.num_winners
+                    )
+                    result = self.result_cache.get(keys[method_str])
+                    if result is not None:
+                        cached[method_str] = (
+                            result["winners"],
+                            result["losers"],
+                            result["tie"],
+                        )
+        missing = [name for name in self.method_strs if name not in cached]
+        computed = {}
+        if missing:
+            # Workers receive the collapsed ballots once, when they start
+            with self.profiler.phase("collapse"):
+                groups = self.ballots.collapse()
+            # Tally once here rather than once per pairwise method's process
+            d = None
+            pairwise = set(missing) & set(VotingMethodFactory.PAIRWISE_METHODS)
+            if len(pairwise) > 1:
+                with self.profiler.phase("score_pairwise"):
+                    d = PairwiseMatrix.for_ballots(groups.movies, groups).d
+            with (
+                self.profiler.phase("compare", methods=missing),
+                ProcessPoolExecutor(
+                    max_workers=len(missing),
+                    initializer=_init_comparison_worker,
+                    initargs=(groups, d),
+                ) as pool,
+            ):
+                futures = {
+                    method_str: pool.submit(
+                        _run_comparison_method, method_str, self.num_winners
+                    )
+                    for method_str in missing
+                }
+                computed = {name: future.result() for name, future in futures.items()}
+        for method_str, (winners, losers, tie, debug) in computed.items():
+            if method_str in keys:
+                self.result_cache.put(
+                    keys[method_str],
+                    {"winners": winners, "losers": losers, "tie": tie, "debug": debug},
+                )
+        self.results = {
+            name: cached[name] if name in cached else computed[name][:3]
+            for name in self.method_strs
+        }
+
+    def display_results(self):
+        columns = {
+            name: format_placings(winners, losers, self.show_losers)
+            for name, (winners, losers, _tie) in self.results.items()
+        }
+        widths = {
+            name: max([len(name)] + [len(line) for line in lines])
+            for name, lines in columns.items()
+        }
+        print(f"{'':>8}" + "  ".join(f"{name:<{widths[name]}}" for name in columns))
+        for row in range(max((len(lines) for lines in columns.values()), default=0)):
+            label = "Winner: " if row == 0 else f"#{row + 1}: "
+            cells = [
+                f"{lines[row] if row < len(lines) else '':<{widths[name]}}"
+                for name, lines in columns.items()
+            ]
+            print(f"{label:>8}" + "  ".join(cells).rstrip())
+        if any(tie for _winners, _losers, tie in self.results.values()):
+            print("\n* indicates a tie")
+        if self.show_losers:
+            print("(parentheses) indicate eliminated movies")
+        print()
+
+
+def placing_margins(ballots, winners, losers):
+    """Head-to-head margin of each winner over the movie placed right after it.
+
+    Margins are d[a][b] - d[b][a] from the pairwise tally, so they mean the same
+    thing whichever method produced the placings.
+    """
+    index = []
+    for group in list(winners) + list(losers):
+        for movie in group if isinstance(group, list) else [group]:
+            index.append(ballots.index[movie])
+    num_placed = len(index) - sum(
+        len(group) if isinstance(group, list) else 1 for group in losers
+    )
+    d = tally_pairwise(ballots, ballots.n, workers=1)
+    return [d[a][b] - d[b][a] for a, b in zip(index[:num_placed], index[1:])]
+
+
+def _tabulate_export(filepath, method_strs, num_winners, stream, cache):
+    """Tabulate one export with every method, returning one report row each."""
+    _file_contents, ballots = load_ballots(filepath, stream, cache)
+    groups = ballots.collapse()
+    date = datetime.fromtimestamp(os.path.getmtime(filepath)).date().isoformat()
+    rows = []
+    for method_str in method_strs:
+        method = VotingMethodFactory.create_method(
+            method_str,
+            groups.movies.copy(),
+            groups,
+            num_winners=num_winners,
+            workers=1,  # Exports already run in parallel
+        )
+        winners, losers = method.process_ballots()
+        rows.append(
+            {
+                "file": os.path.basename(filepath),
+                "date": date,
+                "method": method_str,
+                "ballots": groups.num_ballots,
+                "winners": winners,
+                "tie": getattr(method, "tie", False),
+                "margins": placing_margins(groups, winners, losers),
+                "error": None,
+            }
+        )
+    return rows
+
+
+class ReportWriter:
+    """Write batch results as they arrive, as CSV or JSON lines."""
+
+    FIELDS = ("file", "date", "method", "ballots", "winners", "tie", "margins", "error")
+
+    def __init__(self, outfile, fmt="csv"):
+        self.outfile = outfile
+        self.fmt = fmt
+        self.writer = None
+        if fmt == "csv":
+            self.writer = csv.DictWriter(outfile, fieldnames=self.FIELDS)
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.fmt == "csv":
+            row = dict(row)
+            row["winners"] = "; ".join(format_placings(row["winners"], [], False))
+            row["margins"] = " ".join(str(margin) for margin in row["margins"])
+            self.writer.writerow(row)
+        else:
+            self.outfile.write(json.dumps(row) + "\n")
+        self.outfile.flush()
+
+
+class ElectionBatch:
+    """Tabulate every export in an archive, one worker process per export."""
+
+    def __init__(self, filepaths, method_strs, **kwargs):
+        self.filepaths = list(filepaths)
+        self.method_strs = list(dict.fromkeys(method_strs))
+        self.num_winners = kwargs.get("num_winners", 1)
+        self.stream = kwargs.get("stream")
+        self.cache = kwargs.get("cache")
+        self.workers = kwargs.get("workers") or os.cpu_count() or 1
+        self.failed = []
+
+    def run(self, writer):
+        """Tabulate every export, handing each row to writer as it completes.
+
+        An export that cannot be read or tabulated produces a row with its error
+        instead of stopping the batch.
+        """
+        self.failed = []
+        workers = max(1, min(self.workers, len(self.filepaths)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    _tabulate_export,
+                    filepath,
+                    self.method_strs,
+                    self.num_winners,
+                    self.stream,
+                    self.cache,
+                ): filepath
+                for filepath in self.filepaths
+            }
+            for future in as_completed(futures):
+                filepath = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    self.failed.append(filepath)
+                    rows = [
+                        {
+                            "file": os.path.basename(filepath),
+                            "date": None,
+                            "method": None,
+                            "ballots": None,
+                            "winners": [],
+                            "tie": None,
+                            "margins": [],
+                            "error": f"{type(e).__name__}: {e}",
+                        }
+                    ]
+                for row in rows:
+                    writer.write(row)
 
 
 def main():
@@ -83,16 +549,112 @@ def main():
         help="select a file instead of using the most recent expected filename",
         action="store_true",
     )
+    parser.add_argument(
+        "-f",
+        "--file",
+        help="tabulate this .csv.zip export or binary ballot file instead of the "
+        "most recent export",
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--export-binary",
+        help=f"convert the export to a binary ballot file ({BALLOT_FILE_SUFFIX}) "
+        "that loads without parsing, then exit",
+        metavar="PATH",
+    )
     parser.add_argument(
         "-m",
         "--method",
         help="voting method to use",
-        choices=["instant", "instant-reorder", "schulze"],
+        choices=VotingMethodFactory.METHODS,
         default="schulze",
     )
+    parser.add_argument(
+        "-M",
+        "--methods",
+        help="compare several voting methods side by side, running them in parallel",
+        nargs="+",
+        choices=VotingMethodFactory.METHODS,
+    )
     parser.add_argument(
         "-n", "--num_winners", help="number of winners to select", type=int, default=1
     )
+    parser.add_argument(
+        "--stream",
+        help="stream the export in chunks instead of reading it whole "
+        "(default: only for large exports)",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+    )
+    parser.add_argument(
+        "-b",
+        "--bootstrap",
+        help="resample the ballots this many times to estimate how robust the "
+        "result is",
+        type=int,
+        metavar="RESAMPLES",
+    )
+    parser.add_argument(
+        "--seed", help="random seed for --bootstrap", type=int, default=0
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        help="worker processes for --bootstrap, --batch and large pairwise tallies "
+        "(default: CPU count)",
+        type=int,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="parse the export and tabulate it again instead of using the parse "
+        "and result caches",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-B",
+        "--batch",
+        help="tabulate every matching export in the ballots folder in parallel "
+        "and write one report row per export and method",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="file to write the --batch report to (default: standard output)",
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--format",
+        help="--batch report format; json writes one JSON object per line",
+        choices=("csv", "json"),
+        default="csv",
+    )
+    parser.add_argument(
+        "--watch",
+        help="keep running, re-tabulating whenever the export grows "
+        "(checking every SECONDS, default 5)",
+        nargs="?",
+        type=float,
+        const=5.0,
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--audit",
+        help="write the pairwise and strongest path matrices and per-round tallies "
+        "to files starting with PREFIX",
+        metavar="PREFIX",
+    )
+    parser.add_argument(
+        "--audit-format",
+        help="--audit file format; json writes one JSON object per line",
+        choices=AUDIT_FORMATS,
+        default="csv",
+    )
+    parser.add_argument(
+        "--profile",
+        help="write per-phase timings, memory use and iteration counts as JSON",
+        metavar="PATH",
+    )
     parser.add_argument(
         "-d",
         "--debug",
@@ -101,17 +663,103 @@ def main():
     )
 
     args = parser.parse_args()
+    if args.audit and args.methods:
+        parser.error("--audit needs a single --method, not --methods")
 
     cwd = os.getcwd()
     ballots_dir = os.path.join(cwd, "ballots")
     if not os.path.exists(ballots_dir) and not args.select:
         print(f"{ballots_dir} doesn't exist. Creating now")
-    filepath = acquire_file(args.select, "Runoff Votes", path=ballots_dir)
+    cache = None if args.no_cache else ParseCache(os.path.join(cwd, PARSE_CACHE_DIR))
+    # Auditing and profiling need the method to actually run
+    result_cache = None
+    if not (args.no_cache or args.audit or args.profile):
+        result_cache = ResultCache(os.path.join(cwd, RESULT_CACHE_DIR))
+
+    if args.batch:
+        batch = ElectionBatch(
+            find_files("Runoff Votes", ballots_dir),
+            args.methods or [args.method],
+            cache=cache,
+            **vars(args),
+        )
+        if args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as outfile:
+                batch.run(ReportWriter(outfile, args.format))
+        else:
+            batch.run(ReportWriter(sys.stdout, args.format))
+        print(
+            f"Tabulated {len(batch.filepaths)} exports, {len(batch.failed)} failed",
+            file=sys.stderr,
+        )
+        return
+
+    if args.watch:
+        try:
+            ElectionWatcher(ballots_dir, **vars(args)).watch()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.file:
+        filepath = args.file
+    else:
+        filepath = acquire_file(args.select, "Runoff Votes", path=ballots_dir)
+
+    if args.export_binary:
+        _file_contents, ballots = load_ballots(filepath, args.stream, cache)
+        write_ballot_file(args.export_binary, ballots)
+        print(f"Wrote {len(ballots)} ballots to {args.export_binary}")
+        return
 
-    election = Election(filepath, **vars(args))
+    profiler = Profiler() if args.profile else None
+
+    if args.methods:
+        election = ElectionComparison(
+            filepath,
+            args.methods,
+            cache=cache,
+            result_cache=result_cache,
+            profiler=profiler,
+            **vars(args),
+        )
+    else:
+        election = Election(
+            filepath,
+            cache=cache,
+            result_cache=result_cache,
+            profiler=profiler,
+            **vars(args),
+        )
     election.calculate()
     election.display_results()
 
+    if args.audit:
+        for path in AuditExporter(election.voting_method, args.audit_format).write(
+            args.audit
+        ):
+            print(f"Audit written to {path}")
+
+    if args.bootstrap:
+        for method_str in args.methods or [args.method]:
+            analysis = BootstrapAnalysis(
+                election.movies,
+                election.ballots,
+                method_str,
+                num_winners=args.num_winners,
+                resamples=args.bootstrap,
+                seed=args.seed,
+                workers=args.workers,
+            )
+            with election.profiler.phase("bootstrap", method=method_str):
+                analysis.run()
+            print(f"~~~~~ {method_str.title()} {analysis}")
+
+    if profiler is not None:
+        profiler.stop()
+        profiler.write(args.profile)
+        print(f"Profile written to {args.profile}")
+
 
 if __name__ == "__main__":
     main()
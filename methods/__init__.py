@@ -2,10 +2,33 @@ from .voting_method import VotingMethod
 from .method_factory import VotingMethodFactory
 from .schulze import SchulzeMethod
 from .runoff import InstantRunoffMethod
+from .stv import STVMethod
+from .condorcet import (
+    CopelandMethod,
+    MinimaxMethod,
+    PairwiseMethod,
+    RankedPairsMethod,
+)
+from .bootstrap import BootstrapAnalysis
+from .audit import AuditExporter
+from .tabulation import ElectionResult, Tabulator, tabulate, tabulate_async
+from .result_cache import ResultCache
 
 __all__ = [
     "VotingMethod",
     "VotingMethodFactory",
     "SchulzeMethod",
     "InstantRunoffMethod",
+    "STVMethod",
+    "PairwiseMethod",
+    "RankedPairsMethod",
+    "CopelandMethod",
+    "MinimaxMethod",
+    "BootstrapAnalysis",
+    "AuditExporter",
+    "ElectionResult",
+    "ResultCache",
+    "Tabulator",
+    "tabulate",
+    "tabulate_async",
 ]
@@ -0,0 +1,111 @@
+import csv
+import json
+
+AUDIT_FORMATS = ("csv", "json")
+
+
+class AuditExporter:
+    """
+    Stream a finished tabulation's working data to files for auditing.
+
+    Each table is written one row at a time as it is read from the method, so
+    even with hundreds of candidates no table is ever built up as a string:
+        - pairwise: d[i][j], voters ranking movie i above movie j
+        - paths: p[i][j], Schulze strongest path strengths
+        - rounds: per-round tallies of round-based methods (see get_rounds)
+    Tables a method does not have are skipped.
+
+    In csv format every table goes to its own file, <prefix>.<table>.csv. In json
+    format everything goes to <prefix>.jsonl, one JSON object per line, tagged
+    with its table.
+
+    Attributes:
+        method (VotingMethod): A method whose process_ballots has been run
+        fmt (str): "csv" or "json"
+    """
+
+    def __init__(self, method, fmt="csv"):
+        if fmt not in AUDIT_FORMATS:
+            raise ValueError(f"Unknown audit format: {fmt}")
+        self.method = method
+        self.fmt = fmt
+        # Instant runoff removes movies from method.movies as they are eliminated
+        self.movies = list(getattr(method.ballots, "movies", method.movies))
+
+    def tables(self):
+        """Return the names of the tables this method can export."""
+        tables = []
+        if getattr(self.method, "d", None) is not None:
+            tables.append("pairwise")
+        if getattr(self.method, "p", None) is not None:
+            tables.append("paths")
+        if self.method.get_rounds():
+            tables.append("rounds")
+        return tables
+
+    def _matrix_rows(self, matrix):
+        for i, movie in enumerate(self.movies):
+            yield movie, matrix[i]
+
+    def _round_rows(self):
+        for number, info in enumerate(self.method.get_rounds(), start=1):
+            decided = {
+                movie: outcome
+                for outcome in ("elected", "excluded", "eliminated")
+                for movie in info.get(outcome, [])
+            }
+            counts = info.get("first_votes") or info.get("totals") or {}
+            for movie, count in counts.items():
+                yield number, movie, count, decided.get(movie, "")
+
+    def rows(self, table):
+        """Yield the rows of one table as dicts."""
+        if table == "rounds":
+            for number, movie, count, outcome in self._round_rows():
+                yield {
+                    "round": number,
+                    "movie": movie,
+                    "votes": count,
+                    "outcome": outcome,
+                }
+            return
+        matrix = self.method.d if table == "pairwise" else self.method.p
+        for movie, counts in self._matrix_rows(matrix):
+            yield {"movie": movie, "counts": counts}
+
+    def write(self, prefix):
+        """
+        Write every available table.
+
+        Args:
+            prefix (str): Path prefix for the files written
+
+        Returns:
+            list: Paths of the files written
+        """
+        if self.fmt == "json":
+            path = f"{prefix}.jsonl"
+            with open(path, "w", encoding="utf-8") as outfile:
+                outfile.write(
+                    json.dumps({"table": "movies", "movies": self.movies}) + "\n"
+                )
+                for table in self.tables():
+                    for row in self.rows(table):
+                        outfile.write(json.dumps({"table": table, **row}) + "\n")
+            return [path]
+
+        paths = []
+        for table in self.tables():
+            path = f"{prefix}.{table}.csv"
+            with open(path, "w", newline="", encoding="utf-8") as outfile:
+                writer = csv.writer(outfile)
+                if table == "rounds":
+                    writer.writerow(["round", "movie", "votes", "outcome"])
+                    writer.writerows(self._round_rows())
+                else:
+                    writer.writerow([""] + self.movies)
+                    matrix = self.method.d if table == "pairwise" else self.method.p
+                    for movie, counts in self._matrix_rows(matrix):
+                        writer.writerow([movie] + list(counts))
+            paths.append(path)
+        return paths
@@ -0,0 +1,168 @@
+import os
+import random
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from domain import BallotMatrix, as_ballot_matrix
+from .method_factory import VotingMethodFactory
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+
+def _placings(winners, losers):
+    """Return (movie, place) pairs, where tied movies share a place."""
+    placings = {}
+    for group in list(winners) + list(losers):
+        place = len(placings)
+        for movie in group if isinstance(group, list) else [group]:
+            placings.setdefault(movie, place)
+    return placings.items()
+
+
+def _resample_weights(weights, total, seed, index):
+    """Draw total ballots with replacement, returned as a count per ranking."""
+    if np is not None:
+        rng = np.random.default_rng([seed, index])
+        return rng.multinomial(total, np.asarray(weights) / total).tolist()
+    rng = random.Random(f"{seed}-{index}")
+    counts = [0] * len(weights)
+    for row in rng.choices(range(len(weights)), weights=weights, k=total):
+        counts[row] += 1
+    return counts
+
+
+_shared = {}
+
+
+def _init_worker(groups, method_str, num_winners, seed):
+    _shared.update(
+        groups=groups, method_str=method_str, num_winners=num_winners, seed=seed
+    )
+
+
+def _run_resamples(start, stop):
+    groups = _shared["groups"]
+    seed = _shared["seed"]
+    weights = list(groups.weights)
+    total = sum(weights)
+    n = groups.n
+    wins = {movie: 0 for movie in groups.movies}
+    places = {movie: [0] * n for movie in groups.movies}
+    for index in range(start, stop):
+        counts = _resample_weights(weights, total, seed, index)
+        ranks = array(groups.typecode)
+        for row, count in enumerate(counts):
+            if count:
+                ranks.extend(groups.ranks[row * n : (row + 1) * n])
+        resample = BallotMatrix(
+            groups.movies,
+            ranks,
+            array(BallotMatrix.weight_typecode, filter(None, counts)),
+        )
+        random.seed(f"{seed}-{index}-ties")  # Instant runoff breaks ties randomly
+        method = VotingMethodFactory.create_method(
+            _shared["method_str"],
+            groups.movies.copy(),
+            resample,
+            num_winners=_shared["num_winners"],
+            group=False,
+            workers=1,  # Resamples already run in parallel
+        )
+        winners, losers = method.process_ballots()
+        for movie, _place in _placings(winners, []):
+            wins[movie] += 1
+        for movie, place in _placings(winners, losers):
+            places[movie][place] += 1
+    return wins, places
+
+
+class BootstrapAnalysis:
+    """
+    Estimate how robust an election result is by resampling the ballots.
+
+    Each resample draws as many ballots as were cast, with replacement, and reruns
+    the voting method on them. Resamples are drawn as a count per distinct ranking
+    rather than as copied ballots, and are split across a process pool. Every
+    resample is seeded from (seed, resample index), so results depend only on the
+    seed, never on how many workers are used.
+
+    Attributes:
+        movies (list): Candidate titles
+        method_str (str): Name of the voting method, as for VotingMethodFactory
+        num_winners (int): Number of winners each rerun selects
+        resamples (int): Number of resamples
+        seed (int): Base seed for all resamples
+        workers (int): Worker processes, defaulting to the CPU count
+    """
+
+    def __init__(self, movies, ballots, method_str="schulze", **kwargs):
+        self.movies = list(movies)
+        self.groups = as_ballot_matrix(self.movies, ballots).collapse()
+        self.method_str = method_str
+        self.num_winners = kwargs.get("num_winners", 1)
+        self.resamples = kwargs.get("resamples", 1000)
+        self.seed = kwargs.get("seed", 0)
+        self.workers = kwargs.get("workers") or os.cpu_count() or 1
+        self.wins = {}
+        self.places = {}
+
+    def run(self):
+        """
+        Run every resample and collect win counts and place distributions.
+
+        Returns:
+            dict: movie -> {"win_rate": float, "places": list} where places[k] is
+                the fraction of resamples in which the movie finished in place k+1
+        """
+        self.wins = {movie: 0 for movie in self.movies}
+        self.places = {movie: [0] * len(self.movies) for movie in self.movies}
+        if self.groups.num_ballots == 0:
+            return self.summary()
+
+        workers = max(1, min(self.workers, self.resamples))
+        bounds = [self.resamples * w // workers for w in range(workers + 1)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.groups, self.method_str, self.num_winners, self.seed),
+        ) as pool:
+            futures = [
+                pool.submit(_run_resamples, start, stop)
+                for start, stop in zip(bounds, bounds[1:])
+                if stop > start
+            ]
+            for future in futures:
+                wins, places = future.result()
+                for movie in self.movies:
+                    self.wins[movie] += wins[movie]
+                    for place, count in enumerate(places[movie]):
+                        self.places[movie][place] += count
+        return self.summary()
+
+    def summary(self):
+        """Return the results collected so far, in the same form as run()."""
+        total = max(1, self.resamples)
+        return {
+            movie: {
+                "win_rate": self.wins.get(movie, 0) / total,
+                "places": [count / total for count in self.places.get(movie, [])],
+            }
+            for movie in self.movies
+        }
+
+    def __str__(self) -> str:
+        summary = self.summary()
+        lines = [f"Bootstrap ({self.resamples} resamples, seed {self.seed}):"]
+        width = max((len(movie) for movie in self.movies), default=0)
+        for movie in sorted(self.movies, key=lambda m: -summary[m]["win_rate"]):
+            places = summary[movie]["places"]
+            mean_place = sum((k + 1) * share for k, share in enumerate(places))
+            common = sorted(range(len(places)), key=lambda k: -places[k])[:3]
+            spread = ", ".join(f"#{k + 1} {places[k]:.0%}" for k in common if places[k])
+            lines.append(
+                f"{movie:<{width}}  wins {summary[movie]['win_rate']:>6.1%}"
+                f"  mean place {mean_place:>5.2f}  ({spread})"
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,180 @@
+from abc import abstractmethod
+from .voting_method import VotingMethod
+from .pairwise import PairwiseMatrix
+
+
+class PairwiseMethod(VotingMethod):
+    """
+    Base class for Condorcet methods that only need the pairwise matrix.
+
+    The matrix comes from PairwiseMatrix.for_ballots, so running several of these
+    methods on the same ballots costs a single tally. Subclasses turn the matrix
+    into one score per candidate, and candidates are placed by score, highest
+    first, with equal scores reported as ties.
+
+    Attributes:
+        n (int): Number of candidates/movies
+        d (list): 2D matrix storing direct pairwise preferences (do not modify)
+        scores (list): Score of each candidate, set by process_ballots
+    """
+
+    score_label = "Scores"
+    reusable = True
+
+    def __init__(self, movies, ballots, **kwargs):
+        """
+        Initialize the calculator.
+
+        Args:
+            movies (list): List of movie candidates
+            ballots (list | BallotMatrix): Ballots containing voter preferences
+            **kwargs: Additional arguments passed to parent class
+                vectorize (bool): Force or disable the numpy pairwise tally.
+                    Defaults to numpy when it is installed.
+                workers (int): Processes to split the pairwise tally across.
+                    Defaults to the CPU count for very large ballot sets only.
+        """
+        super().__init__(movies, ballots, **kwargs)
+        self.n = len(movies)
+        self.vectorize = kwargs.get("vectorize", None)
+        self.workers = kwargs.get("workers", None)
+        self.d = None
+        self.scores = []
+        self.processed = False  # Flag to track if process_ballots has been run
+
+    def score_pairwise(self):
+        """Fetch the pairwise matrix for the ballots, tallying it if needed."""
+        with self.profiler.phase("score_pairwise"):
+            pairwise = PairwiseMatrix.for_ballots(
+                self.movies,
+                self.ballots,
+                group=self.group,
+                vectorize=self.vectorize,
+                workers=self.workers,
+            )
+        self.d = pairwise.d
+
+    @abstractmethod
+    def compute_scores(self):
+        """Return a list with one score per candidate, higher is better."""
+        raise NotImplementedError("Subclass must implement compute_scores method")
+
+    def process_ballots(self):
+        """
+        Score candidates from the pairwise matrix and split winners from losers.
+
+        Returns:
+            tuple: (winners, losers) where:
+                - winners: List of winning candidates (or nested lists for ties)
+                - losers: List of remaining candidates in order of preference
+        """
+        if self.d is None:
+            self.score_pairwise()
+        with self.profiler.phase("rank"):
+            self.scores = self.compute_scores()
+        self.tie = False
+
+        # Group candidates by score, highest first
+        score_groups = {}
+        for idx in sorted(range(self.n), key=lambda i: -self.scores[i]):
+            score_groups.setdefault(self.scores[idx], []).append(self.movies[idx])
+
+        winners = []
+        losers = []
+        remaining_winners_needed = self.num_winners
+        for candidates in score_groups.values():
+            if remaining_winners_needed == 0:
+                losers.extend(candidates)
+            elif len(candidates) == 1:
+                winners.append(candidates[0])
+                remaining_winners_needed -= 1
+            else:
+                self.tie = True
+                winners.append(candidates)
+                remaining_winners_needed = 0
+
+        self.processed = True
+        return winners, losers
+
+    def get_debug(self):
+        if not self.processed:
+            return "Warning: Must run process_ballots() before getting debug information.\n"
+
+        width = max((len(movie) for movie in self.movies), default=0)
+        lines = [f"{self.score_label}:"]
+        for i in sorted(range(self.n), key=lambda i: -self.scores[i]):
+            lines.append(f"{' ':>4}{self.movies[i]:<{width}}  {self.scores[i]}")
+        return "\n".join(lines) + "\n"
+
+
+class CopelandMethod(PairwiseMethod):
+    """
+    Copeland's method: candidates are ranked by pairwise wins minus pairwise losses.
+    """
+
+    score_label = "Wins minus losses"
+
+    def compute_scores(self):
+        d = self.d
+        return [
+            sum((d[i][j] > d[j][i]) - (d[i][j] < d[j][i]) for j in range(self.n))
+            for i in range(self.n)
+        ]
+
+
+class MinimaxMethod(PairwiseMethod):
+    """
+    Minimax (margins): candidates are ranked by their worst pairwise defeat, the
+    candidate whose largest losing margin is smallest coming first.
+    """
+
+    score_label = "Worst defeat margin (negated)"
+
+    def compute_scores(self):
+        d = self.d
+        return [
+            -max((d[j][i] - d[i][j] for j in range(self.n) if j != i), default=0)
+            for i in range(self.n)
+        ]
+
+
+class RankedPairsMethod(PairwiseMethod):
+    """
+    Ranked Pairs (Tideman): pairwise victories are locked in from the largest
+    margin down, skipping any that would create a cycle with those already
+    locked. Candidates are then ranked by how many others are locked above them.
+
+    Victories with equal margins are taken by larger winning vote count, then in
+    candidate order, so the result is deterministic.
+
+    Attributes:
+        locked (list): Locked (winner, loser) index pairs, in the order locked
+    """
+
+    score_label = "Candidates locked above (negated)"
+
+    def compute_scores(self):
+        d = self.d
+        n = self.n
+        victories = sorted(
+            (
+                (d[i][j] - d[j][i], d[i][j], -i, -j)
+                for i in range(n)
+                for j in range(n)
+                if d[i][j] > d[j][i]
+            ),
+            reverse=True,
+        )
+        # reach[x] is a bitmask of every candidate reachable from x
+        reach = [0] * n
+        self.locked = []
+        for _margin, _votes, i, j in victories:
+            i, j = -i, -j
+            if reach[j] >> i & 1:
+                continue  # j already beats i through locked victories
+            self.locked.append((i, j))
+            gained = reach[j] | 1 << j
+            for x in range(n):
+                if x == i or reach[x] >> i & 1:
+                    reach[x] |= gained
+        return [-sum(reach[x] >> i & 1 for x in range(n)) for i in range(n)]
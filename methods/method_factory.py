@@ -1,8 +1,22 @@
 from .schulze import SchulzeMethod
 from .runoff import InstantRunoffMethod
+from .stv import STVMethod
+from .condorcet import CopelandMethod, MinimaxMethod, RankedPairsMethod
 
 
 class VotingMethodFactory:
+    METHODS = (
+        "instant",
+        "instant-reorder",
+        "schulze",
+        "ranked-pairs",
+        "copeland",
+        "minimax",
+        "stv",
+    )
+    # Methods ranked from the pairwise matrix, which PairwiseMatrix shares
+    PAIRWISE_METHODS = ("schulze", "ranked-pairs", "copeland", "minimax")
+
     @staticmethod
     def create_method(method_name, movies, ballots, **kwargs):
         if method_name == "schulze":
@@ -11,5 +25,13 @@ class VotingMethodFactory:
             return InstantRunoffMethod(movies, ballots, reorder=False, **kwargs)
         elif method_name == "instant-reorder":
             return InstantRunoffMethod(movies, ballots, reorder=True, **kwargs)
+        elif method_name == "ranked-pairs":
+            return RankedPairsMethod(movies, ballots, **kwargs)
+        elif method_name == "copeland":
+            return CopelandMethod(movies, ballots, **kwargs)
+        elif method_name == "minimax":
+            return MinimaxMethod(movies, ballots, **kwargs)
+        elif method_name == "stv":
+            return STVMethod(movies, ballots, **kwargs)
         else:
             raise ValueError(f"Unknown voting method: {method_name}")
@@ -0,0 +1,382 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from domain import BallotMatrix, SparseBallots, as_ballot_matrix
+from domain.sparse_ballots import ranked_density
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+# Upper bound on the number of boolean cells in one (batch x n x n) comparison
+# block, which keeps the vectorized tally's memory use independent of ballot count.
+MAX_BATCH_CELLS = 1 << 22
+# Smallest tally (rows x n x n comparisons) that is split across worker processes
+# by default; below this, starting a pool costs more than it saves.
+PARALLEL_MIN_CELLS = 1 << 27
+# Ballot matrices with at most this fraction of ranked cells are tallied from
+# their sparse (column, rank) entries instead of every pair of columns.
+SPARSE_MAX_DENSITY = 0.3
+
+
+def numpy_available():
+    """Return True if the vectorized tally path can be used."""
+    return np is not None
+
+
+def _iter_votes(ballots):
+    """Yield (votes, weight) for each ballot or weighted row."""
+    if isinstance(ballots, BallotMatrix):
+        return ((votes, ballots.weight(b)) for b, votes in enumerate(ballots.rows()))
+    return ((ballot.votes, 1) for ballot in ballots)
+
+
+def _rank_batches(ballots, n, batch_size):
+    """Yield (ranks, weights) arrays, where weights is None for unweighted ballots."""
+    if isinstance(ballots, BallotMatrix):
+        ranks = ballots.to_numpy()
+        weights = ballots.weights_numpy() if ballots.weights is not None else None
+        for start in range(0, len(ranks), batch_size):
+            stop = start + batch_size
+            yield ranks[start:stop], None if weights is None else weights[start:stop]
+        return
+    for start in range(0, len(ballots), batch_size):
+        ranks = np.array(
+            [ballot.votes for ballot in ballots[start : start + batch_size]],
+            dtype=np.int32,
+        )
+        yield ranks.reshape(-1, n), None
+
+
+def tally_pairwise_python(ballots, n):
+    """
+    Count pairwise preferences with plain Python loops.
+
+    Args:
+        ballots (list | BallotMatrix): Ballots containing voter preferences
+        n (int): Number of candidates
+
+    Returns:
+        list: n x n matrix where d[i][j] is the number of voters ranking i above j
+    """
+    d = [[0 for i in range(n)] for j in range(n)]
+    for votes, weight in _iter_votes(ballots):
+        for i in range(n):
+            for j in range(n):
+                if i != j and votes[i] != -1 and votes[j] != -1:
+                    if votes[i] < votes[j]:
+                        d[i][j] += weight
+    return d
+
+
+def tally_pairwise_sparse_python(ballots, n):
+    """
+    Count pairwise preferences from sparse ballots with plain Python loops.
+
+    Only pairs of ranked entries are visited, O(k^2) per ballot with k ranked
+    movies. Unranked movies never count either way, as in the dense tallies, so
+    there is nothing to add for ranked-versus-unranked pairs.
+
+    Args:
+        ballots (SparseBallots): Ballots containing voter preferences
+        n (int): Number of candidates
+
+    Returns:
+        list: n x n matrix where d[i][j] is the number of voters ranking i above j
+    """
+    d = [[0 for i in range(n)] for j in range(n)]
+    for b in range(len(ballots)):
+        entries = sorted(ballots.entries(b), key=lambda entry: entry[1])
+        weight = ballots.weight(b)
+        for a, (i, rank_i) in enumerate(entries):
+            for j, rank_j in entries[a + 1 :]:
+                if rank_i < rank_j:
+                    d[i][j] += weight
+    return d
+
+
+def tally_pairwise_sparse_numpy(ballots, n, batch_size=None):
+    """
+    Count pairwise preferences from sparse ballots with numpy.
+
+    Ballots are grouped by how many movies they rank, k, so each group is a
+    (ballots x k) block of columns and ranks. Every ordered pair of entries
+    where the first is ranked ahead adds the ballot's weight to d, via one
+    bincount per batch.
+
+    Args:
+        ballots (SparseBallots): Ballots containing voter preferences
+        n (int): Number of candidates
+        batch_size (int): Cap on ballots x k x k cells per batch, derived from
+            MAX_BATCH_CELLS if omitted
+
+    Returns:
+        list: n x n matrix where d[i][j] is the number of voters ranking i above j
+    """
+    if batch_size is None:
+        batch_size = MAX_BATCH_CELLS
+    offsets = np.frombuffer(ballots.offsets, dtype=np.int64)
+    columns = np.frombuffer(ballots.columns, dtype=np.int16).astype(np.int64)
+    ranks = np.frombuffer(ballots.ranks, dtype=np.int16)
+    weights = ballots.weights_numpy()
+    lengths = np.diff(offsets)
+
+    d = np.zeros(n * n, dtype=np.int64)
+    for k in np.unique(lengths).tolist():
+        if k < 2:
+            continue
+        rows = np.flatnonzero(lengths == k)
+        step = max(1, batch_size // (k * k))
+        for start in range(0, len(rows), step):
+            batch = rows[start : start + step]
+            entries = offsets[batch][:, None] + np.arange(k)
+            cols, vals = columns[entries], ranks[entries]
+            ahead = vals[:, :, None] < vals[:, None, :]
+            cells = (cols[:, :, None] * n + cols[:, None, :])[ahead]
+            counts = np.broadcast_to(weights[batch][:, None, None], ahead.shape)
+            d += np.bincount(cells, weights=counts[ahead], minlength=n * n).astype(
+                np.int64
+            )
+    return d.reshape(n, n).tolist()
+
+
+def tally_pairwise_numpy(ballots, n, batch_size=None):
+    """
+    Count pairwise preferences with broadcast comparisons over a rank array.
+
+    Ballots are converted to a (batch x n) rank array a batch at a time (a
+    BallotMatrix is viewed in place instead), and each batch contributes
+    (ranks[:, i] < ranks[:, j]) for every pair where both candidates are ranked,
+    scaled by the row weights of a collapsed matrix. Unranked candidates (-1)
+    never count either way.
+
+    Args:
+        ballots (list | BallotMatrix): Ballots containing voter preferences
+        n (int): Number of candidates
+        batch_size (int): Ballots per batch, derived from MAX_BATCH_CELLS if omitted
+
+    Returns:
+        list: n x n matrix where d[i][j] is the number of voters ranking i above j
+    """
+    if batch_size is None:
+        batch_size = max(1, MAX_BATCH_CELLS // max(1, n * n))
+
+    d = np.zeros((n, n), dtype=np.int64)
+    for ranks, weights in _rank_batches(ballots, n, batch_size):
+        ranked = ranks != -1
+        prefers = ranks[:, :, None] < ranks[:, None, :]
+        prefers &= ranked[:, :, None]
+        prefers &= ranked[:, None, :]
+        if weights is None:
+            d += prefers.sum(axis=0)
+        else:
+            d += np.tensordot(weights, prefers, axes=1)
+    return d.tolist()
+
+
+def _tally_shard(name, typecode, n, rows, weighted, start, stop, vectorize):
+    """Tally rows [start, stop) of a matrix held in shared memory."""
+    shm = shared_memory.SharedMemory(name=name, track=False)
+    try:
+        itemsize = shm.buf[:0].cast(typecode).itemsize
+        ranks = shm.buf[start * n * itemsize : stop * n * itemsize].cast(typecode)
+        weights = None
+        if weighted:
+            offset = _aligned(rows * n * itemsize)
+            weights = shm.buf[offset + start * 8 : offset + stop * 8].cast(
+                BallotMatrix.weight_typecode
+            )
+        shard = BallotMatrix(range(n), ranks, weights)
+        d = tally_pairwise(shard, n, vectorize=vectorize, workers=1)
+        # Views into the segment must be released before it can be closed
+        del shard
+        ranks.release()
+        if weights is not None:
+            weights.release()
+        return d
+    finally:
+        shm.close()
+
+
+def _aligned(size):
+    return size + -size % 8
+
+
+def tally_pairwise_parallel(ballots, n, workers=None, vectorize=None):
+    """
+    Count pairwise preferences with a process pool, one shard of rows per worker.
+
+    The rank buffer (and row weights, if any) is copied once into a shared memory
+    segment; each worker tallies its range of rows in place and returns only its
+    n x n partial matrix, and the partial matrices are summed.
+
+    Args:
+        ballots (BallotMatrix): Ballots containing voter preferences
+        n (int): Number of candidates
+        workers (int): Worker processes, defaulting to the CPU count
+        vectorize (bool): Passed on to each worker's tally_pairwise
+
+    Returns:
+        list: n x n matrix where d[i][j] is the number of voters ranking i above j
+    """
+    workers = workers or os.cpu_count() or 1
+    rows = len(ballots)
+    weighted = ballots.weights is not None
+    ranks = memoryview(ballots.ranks).cast("B")
+    offset = _aligned(len(ranks))
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(1, offset + (rows * 8 if weighted else 0))
+    )
+    try:
+        shm.buf[: len(ranks)] = ranks
+        if weighted:
+            shm.buf[offset : offset + rows * 8] = memoryview(ballots.weights).cast("B")
+
+        d = [[0 for i in range(n)] for j in range(n)]
+        bounds = [rows * w // workers for w in range(workers + 1)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _tally_shard,
+                    shm.name,
+                    ballots.typecode,
+                    n,
+                    rows,
+                    weighted,
+                    start,
+                    stop,
+                    vectorize,
+                )
+                for start, stop in zip(bounds, bounds[1:])
+                if stop > start
+            ]
+            for future in futures:
+                for i, row in enumerate(future.result()):
+                    for j, count in enumerate(row):
+                        d[i][j] += count
+        return d
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def tally_pairwise(ballots, n, vectorize=None, workers=None):
+    """
+    Count pairwise preferences, using numpy when it is available.
+
+    Args:
+        ballots (list | BallotMatrix | SparseBallots): Ballots containing voter
+            preferences. Ballot matrices with at most SPARSE_MAX_DENSITY of
+            their cells ranked are converted to SparseBallots first.
+        n (int): Number of candidates
+        vectorize (bool): Force (True) or disable (False) the numpy path.
+            Defaults to using numpy whenever it is installed.
+        workers (int): Split the tally of a BallotMatrix across this many
+            processes. Defaults to the CPU count for tallies of at least
+            PARALLEL_MIN_CELLS comparisons, and to 1 (no pool) otherwise.
+
+    Returns:
+        list: n x n matrix where d[i][j] is the number of voters ranking i above j
+    """
+    if vectorize is None:
+        vectorize = numpy_available()
+    if vectorize and not numpy_available():
+        raise ImportError("numpy is required for vectorized pairwise tallying")
+    if isinstance(ballots, BallotMatrix):
+        if workers is None and len(ballots) * n * n >= PARALLEL_MIN_CELLS:
+            workers = os.cpu_count()
+        if workers and workers > 1 and len(ballots) > 1:
+            return tally_pairwise_parallel(ballots, n, workers, vectorize)
+        if ranked_density(ballots) <= SPARSE_MAX_DENSITY:
+            ballots = SparseBallots.from_matrix(ballots)
+    if isinstance(ballots, SparseBallots):
+        if vectorize:
+            return tally_pairwise_sparse_numpy(ballots, n)
+        return tally_pairwise_sparse_python(ballots, n)
+    if vectorize:
+        return tally_pairwise_numpy(ballots, n)
+    return tally_pairwise_python(ballots, n)
+
+
+class PairwiseMatrix:
+    """
+    Pairwise preference counts for a ballot set, shared by the Condorcet methods.
+
+    for_ballots() keeps the most recently used matrices keyed on a digest of the
+    ballots, so every method run on the same ballots in one process reuses a
+    single tally. The counts must not be modified; use counts() for a copy.
+    The cache may be used from several threads.
+
+    Attributes:
+        movies (list): Candidate titles, one per row and column
+        n (int): Number of candidates
+        d (list): n x n matrix where d[i][j] is the number of voters ranking i above j
+    """
+
+    CACHE_SIZE = 8
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, movies, d):
+        self.movies = list(movies)
+        self.n = len(self.movies)
+        self.d = d
+
+    @classmethod
+    def for_ballots(cls, movies, ballots, group=True, vectorize=None, workers=None):
+        """
+        Return the pairwise matrix for a ballot set, tallying it only on a miss.
+
+        Args:
+            movies (list): Candidate titles
+            ballots (list | BallotMatrix): Ballots containing voter preferences
+            group (bool): Collapse identical rankings before tallying on a miss
+            vectorize (bool): Passed on to tally_pairwise on a miss
+            workers (int): Passed on to tally_pairwise on a miss
+        """
+        ballots = as_ballot_matrix(movies, ballots)
+        key = ballots.digest()
+        with cls._lock:
+            if key in cls._cache:
+                cls._cache.move_to_end(key)
+                return cls._cache[key]
+        # Tally outside the lock; a concurrent miss on the same key keeps one result
+        groups = ballots.collapse() if group else ballots
+        d = tally_pairwise(groups, len(movies), vectorize=vectorize, workers=workers)
+        return cls._store(key, cls(movies, d))
+
+    @classmethod
+    def remember(cls, ballots, d):
+        """
+        Cache a tally made elsewhere, e.g. in a parent process, for ballots.
+
+        Args:
+            ballots (BallotMatrix): Ballots the tally counts
+            d (list): Their n x n pairwise preference matrix
+        """
+        return cls._store(ballots.digest(), cls(ballots.movies, d))
+
+    @classmethod
+    def _store(cls, key, matrix):
+        with cls._lock:
+            matrix = cls._cache.setdefault(key, matrix)
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls.CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return matrix
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._lock:
+            cls._cache.clear()
+
+    def counts(self):
+        """Return a copy of d that the caller may modify."""
+        return [row.copy() for row in self.d]
+
+    def margin(self, i, j):
+        """Return how many more voters ranked i above j than j above i."""
+        return self.d[i][j] - self.d[j][i]
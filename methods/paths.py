@@ -0,0 +1,153 @@
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+# Below this many candidates the plain loops beat numpy's per-call overhead.
+VECTORIZE_MIN_CANDIDATES = 6
+
+
+def initial_paths(d):
+    """Return the direct path strengths: d[i][j] where i beats j, else 0."""
+    n = len(d)
+    return [
+        [d[i][j] if i != j and d[i][j] > d[j][i] else 0 for j in range(n)]
+        for i in range(n)
+    ]
+
+
+def condorcet_winner(d):
+    """
+    Return the candidate who beats every other one head to head, if any.
+
+    Args:
+        d (list): n x n pairwise preference matrix
+
+    Returns:
+        int: Index of the Condorcet winner, or None if there is none
+    """
+    n = len(d)
+    # Only the survivor of a run of head-to-head contests can beat everyone
+    winner = 0
+    for i in range(1, n):
+        if d[i][winner] > d[winner][i]:
+            winner = i
+    if all(d[winner][j] > d[j][winner] for j in range(n) if j != winner):
+        return winner
+    return None
+
+
+def smith_set(d):
+    """
+    Return the smallest set of candidates who each beat everyone outside it.
+
+    The candidate not beaten by the most others is always in the set, and the
+    set is everyone who reaches that candidate through a chain of wins or ties.
+
+    Args:
+        d (list): n x n pairwise preference matrix
+
+    Returns:
+        list: Sorted indices of the Smith set, a single Condorcet winner when
+            there is one
+    """
+    n = len(d)
+    if n == 0:
+        return []
+    unbeaten = [sum(1 for j in range(n) if d[i][j] >= d[j][i]) for i in range(n)]
+    top = max(range(n), key=lambda i: unbeaten[i])
+    members = {top}
+    pending = [top]
+    while pending:
+        i = pending.pop()
+        for j in range(n):
+            if j not in members and d[j][i] >= d[i][j]:
+                members.add(j)
+                pending.append(j)
+    return sorted(members)
+
+
+def widest_paths_python(d):
+    """
+    Compute strongest path strengths with Floyd-Warshall in plain Python.
+
+    Each intermediate i only updates pairs j, k with p[j][i] and p[i][k] both
+    non-zero, since any other pair's strength through i is 0, so empty rows and
+    columns of p are skipped. A Condorcet winner, for example, has no path into
+    it and is passed over as an intermediate.
+
+    Args:
+        d (list): n x n pairwise preference matrix
+
+    Returns:
+        list: n x n matrix where p[i][j] is the strength of the strongest path
+            from i to j
+    """
+    n = len(d)
+    p = initial_paths(d)
+    for i in range(n):
+        row_i = p[i]
+        targets = [k for k in range(n) if row_i[k]]
+        if not targets:
+            continue
+        for j in range(n):
+            through = p[j][i]
+            if not through:
+                continue
+            row_j = p[j]
+            for k in targets:
+                if k != j:
+                    strength = min(through, row_i[k])
+                    if strength > row_j[k]:
+                        row_j[k] = strength
+    return p
+
+
+def widest_paths_numpy(d):
+    """
+    Compute strongest path strengths with one vectorized step per intermediate.
+
+    For each intermediate candidate i the whole matrix is updated in place with
+    p = max(p, min(p[:, i], p[i, :])), reusing one buffer for the minimum. The
+    diagonal may pick up cycle strengths along the way, but a diagonal entry
+    can never raise an off-diagonal one (min(p[j][j], p[j][k]) <= p[j][k]), so
+    it is reset to 0 once at the end and the result matches the loop version.
+
+    Args:
+        d (list): n x n pairwise preference matrix
+
+    Returns:
+        list: n x n matrix where p[i][j] is the strength of the strongest path
+            from i to j
+    """
+    n = len(d)
+    direct = np.array(d, dtype=np.int64).reshape(n, n)
+    p = np.where(direct > direct.T, direct, 0)
+    through = np.empty_like(p)
+    for i in range(n):
+        np.minimum(p[:, i, None], p[i], out=through)
+        np.maximum(p, through, out=p)
+    np.fill_diagonal(p, 0)
+    return p.tolist()
+
+
+def widest_paths(d, vectorize=None):
+    """
+    Compute strongest path strengths, choosing the implementation by size.
+
+    Args:
+        d (list): n x n pairwise preference matrix
+        vectorize (bool): Force (True) or disable (False) the numpy path.
+            Defaults to numpy when it is installed and there are at least
+            VECTORIZE_MIN_CANDIDATES candidates.
+
+    Returns:
+        list: n x n matrix of strongest path strengths
+    """
+    if vectorize is None:
+        vectorize = np is not None and len(d) >= VECTORIZE_MIN_CANDIDATES
+    if vectorize:
+        if np is None:
+            raise ImportError("numpy is required for vectorized path computation")
+        return widest_paths_numpy(d)
+    return widest_paths_python(d)
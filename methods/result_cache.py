@@ -0,0 +1,157 @@
+import os
+import copy
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from .method_factory import VotingMethodFactory
+
+# Cache directory created in the working directory by elect.py and serve.py.
+RESULT_CACHE_DIR = ".result_cache"
+# Part of every key; bump it whenever a change to a voting method could change
+# its results, so results stored by older versions are never returned.
+RESULT_CACHE_VERSION = 2
+# Total size the cache directory may grow to before old entries are evicted.
+DEFAULT_CACHE_BYTES = 16 * 1024 * 1024
+
+
+class ResultCache:
+    """
+    Memoized election results, keyed on the ballots' content, method and options.
+
+    Keys use BallotMatrix.canonical_digest(), so a re-downloaded export with the
+    same responses finds the results of the original. Each result is a dict with
+    the winners, losers, tie flag and debug text. The most recently used results
+    are kept in memory; with a directory they are also written there as JSON, so
+    later runs of the CLI find them. Either store drops its least recently used
+    entries once it is full. A ResultCache can be used from several threads.
+
+    Methods that break ties randomly are cached too, so a repeated run reports
+    the same draw as the first one.
+
+    Attributes:
+        directory (str): Where results are written, or None for memory only
+        max_entries (int): Number of results kept in memory
+        max_bytes (int): Size limit for the directory
+    """
+
+    def __init__(self, directory=None, max_entries=64, max_bytes=DEFAULT_CACHE_BYTES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(digest, method_str, **options):
+        """
+        Return the cache key for one tabulation.
+
+        Args:
+            digest (str): The ballots' BallotMatrix.canonical_digest()
+            method_str (str): Voting method name, as for VotingMethodFactory
+            **options: Options that can change the result, e.g. num_winners
+        """
+        spec = [RESULT_CACHE_VERSION, digest, method_str, sorted(options.items())]
+        return hashlib.sha256(json.dumps(spec).encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return a copy of the cached result for a key, or None on a miss."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return copy.deepcopy(result)
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                result = json.load(file)
+            os.utime(path)  # Mark as recently used for eviction
+        except (OSError, ValueError):
+            return None
+        self._remember(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        """Store a result, which must be JSON-serializable."""
+        self._remember(key, copy.deepcopy(result))
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(result, file, ensure_ascii=False)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def tabulate(self, ballots, method_str, num_winners=1, digest=None):
+        """
+        Return a method's result on ballots, running it only on a miss.
+
+        Args:
+            ballots (BallotMatrix): Ballots to tabulate
+            method_str (str): Voting method name, as for VotingMethodFactory
+            num_winners (int): Number of winners to select
+            digest (str): The ballots' canonical_digest(), if already known
+
+        Returns:
+            dict: winners, losers, tie and debug
+        """
+        if digest is None:
+            digest = ballots.canonical_digest()
+        key = self.key(digest, method_str, num_winners=num_winners)
+        result = self.get(key)
+        if result is None:
+            method = VotingMethodFactory.create_method(
+                method_str, ballots.movies.copy(), ballots, num_winners=num_winners
+            )
+            winners, losers = method.process_ballots()
+            result = {
+                "winners": winners,
+                "losers": losers,
+                "tie": getattr(method, "tie", False),
+                "debug": method.get_debug(),
+            }
+            self.put(key, result)
+        return result
+
+    def clear(self):
+        """Forget every result, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.directory is not None and os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    os.remove(entry.path)
+
+    def evict(self):
+        """Remove least recently used files until the directory fits in max_bytes."""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _mtime, size, _path in entries)
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Evicted by another process
+            total -= size
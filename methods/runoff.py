@@ -1,7 +1,7 @@
-import sys
 from random import randint
 from .voting_method import VotingMethod
-from domain import Ballot
+from .runoff_tally import build_runoff_tally
+from domain import BallotMatrix
 
 
 class InstantRunoffMethod(VotingMethod):
@@ -10,45 +10,32 @@ class InstantRunoffMethod(VotingMethod):
         self.maxVote = len(movies)
         self.reorder = kwargs.get("reorder", False)
         self.movies = movies.copy()  # Create a copy to modify
-        self.ballots = [
-            Ballot(ballot.votes.copy()) for ballot in ballots
-        ]  # Deep copy ballots
+        if not isinstance(ballots, BallotMatrix):
+            ballots = BallotMatrix.from_ballots(movies, ballots)
+        self.ballots = ballots  # Never modified; eliminations only update the tally
+        with self.profiler.phase("irv_setup"):
+            self.tally = build_runoff_tally(self.ballot_groups(), self.reorder)
+        # Matrix column of each remaining movie
+        self.columns = list(range(len(movies)))
         self.eliminated = []  # Keep track of eliminated movies in order
+        self.rounds = []  # First votes and eliminations of each round
+        self.processed = False  # Flag to track if process_ballots has been run
 
     def count_votes_for_movie(self, vote_num, movie_index):
-        return sum(
-            1 for ballot in self.ballots if ballot.votes[movie_index] == vote_num
-        )
-
-    def get_next_highest_in_array(self, start, arr):
-        next_highest = sys.maxsize
-        for val in arr:
-            if val < next_highest and val > start:
-                next_highest = val
-        return next_highest
+        self.profiler.count("counts")
+        return self.tally.count(vote_num, self.columns[movie_index])
 
     def shift_first_votes(self, movie_index):
-        for ballot in self.ballots:
-            if ballot.votes[movie_index] == 1:
-                next_highest_vote = self.get_next_highest_in_array(1, ballot.votes)
-                ind_to_swap = ballot.votes.index(next_highest_vote)
-                ballot.votes[ind_to_swap] = 1
-            ballot.votes.pop(movie_index)
+        self.tally.remove(self.columns.pop(movie_index))
         self.movies.pop(movie_index)
 
     def reorder_ballots(self):
-        for ballot in self.ballots:
-            ordered_votes = sorted(ballot.votes)
-            for i, v in enumerate(ordered_votes):
-                idx_to_swap = ballot.votes.index(v)
-                ballot.votes[idx_to_swap] = i + 1
+        self.tally.densify()
 
     def get_indices_with_lowest_vote_count(self, indices_to_check, vote_num):
-        index_counts = {idx: 0 for idx in indices_to_check}
-        for ind in indices_to_check:
-            for ballot in self.ballots:
-                if ballot.votes[ind] == vote_num:
-                    index_counts[ind] += 1
+        index_counts = {
+            idx: self.count_votes_for_movie(vote_num, idx) for idx in indices_to_check
+        }
         lowest = min(index_counts.values())
         return [key for key, val in index_counts.items() if val == lowest]
 
@@ -66,47 +53,80 @@ class InstantRunoffMethod(VotingMethod):
                 s += 1
 
     def process_ballots(self):
-        self.drop_movies_with_no_first_votes()
+        self.processed = True
+        with self.profiler.phase("irv_drop_unranked"):
+            self.drop_movies_with_no_first_votes()
 
+        round_num = 0
         while len(self.movies) > self.num_winners:
-            indices_to_check = list(range(len(self.movies)))
-            for vote in range(1, self.maxVote + 1):
-                indices_to_check = self.get_indices_with_lowest_vote_count(
-                    indices_to_check, vote
-                )
-
-                if len(indices_to_check) == 1:
-                    eliminated = self.movies[indices_to_check[0]]
-                    self.eliminated.insert(
-                        0, eliminated
-                    )  # Add to front of eliminated list
-                    self.shift_first_votes(indices_to_check[0])
-                    if self.reorder:
-                        self.maxVote -= 1
-                        self.reorder_ballots()
-                    break
-
-                if vote == self.maxVote:
-                    self.tie = True
-                    # All remaining candidates are tied for this position
-                    tied_candidates = [self.movies[i] for i in indices_to_check]
-
-                    # If this is for the last winner position, keep all tied candidates
-                    if len(self.movies) == self.num_winners + len(indices_to_check) - 1:
-                        winners = self.movies[:-1]  # All clear winners
-                        winners.append(
-                            tied_candidates
-                        )  # Add tied candidates as a group
-                        return winners, self.eliminated
-
-                    # Otherwise, randomly eliminate all but one
-                    rand_index = randint(0, len(indices_to_check) - 1)
-                    for i, idx in enumerate(indices_to_check):
-                        if i != rand_index:
-                            self.eliminated.insert(0, self.movies[idx])
-                    self.shift_first_votes(indices_to_check[rand_index])
-                    if self.reorder:
-                        self.maxVote -= 1
-                        self.reorder_ballots()
+            round_num += 1
+            with self.profiler.phase(
+                "irv_round", round=round_num, remaining=len(self.movies)
+            ) as record:
+                result = self._run_round(record)
+            if result is not None:
+                return result
 
         return self.movies, self.eliminated
+
+    def _run_round(self, record):
+        """Eliminate one round's movies, returning final results on a tie."""
+        first_votes = {
+            movie: self.tally.count(1, col)
+            for movie, col in zip(self.movies, self.columns)
+        }
+        self.rounds.append({"first_votes": first_votes, "eliminated": []})
+        indices_to_check = list(range(len(self.movies)))
+        for vote in range(1, self.maxVote + 1):
+            self.profiler.count("vote_levels")
+            indices_to_check = self.get_indices_with_lowest_vote_count(
+                indices_to_check, vote
+            )
+
+            if len(indices_to_check) == 1:
+                eliminated = self.movies[indices_to_check[0]]
+                self.eliminated.insert(0, eliminated)  # Add to front of eliminated list
+                record["eliminated"] = self.rounds[-1]["eliminated"] = [eliminated]
+                self.shift_first_votes(indices_to_check[0])
+                if self.reorder:
+                    self.maxVote -= 1
+                    self.reorder_ballots()
+                break
+
+            if vote == self.maxVote:
+                self.tie = True
+                # All remaining candidates are tied for this position
+                tied_candidates = [self.movies[i] for i in indices_to_check]
+
+                # If this is for the last winner position, keep all tied candidates
+                if len(self.movies) == self.num_winners + len(indices_to_check) - 1:
+                    winners = self.movies[:-1]  # All clear winners
+                    winners.append(tied_candidates)  # Add tied candidates as a group
+                    return winners, self.eliminated
+
+                # Otherwise, randomly eliminate all but one
+                rand_index = randint(0, len(indices_to_check) - 1)
+                for i, idx in enumerate(indices_to_check):
+                    if i != rand_index:
+                        self.eliminated.insert(0, self.movies[idx])
+                record["eliminated"] = self.rounds[-1]["eliminated"] = [
+                    movie for i, movie in enumerate(tied_candidates) if i != rand_index
+                ]
+                self.shift_first_votes(indices_to_check[rand_index])
+                if self.reorder:
+                    self.maxVote -= 1
+                    self.reorder_ballots()
+
+        return None
+
+    def get_rounds(self):
+        return [dict(info) for info in self.rounds]
+
+    def get_debug(self):
+        if not self.processed:
+            return "Warning: Must run process_ballots() before getting debug information.\n"
+
+        lines = ["Elimination Order (last eliminated first):"]
+        for i, movie in enumerate(self.eliminated):
+            lines.append(f"{i + 1:>3}. {movie}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,514 @@
+from array import array
+from domain import BallotMatrix
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+
+def preference_order(ranks):
+    """
+    Return each ballot's ranked columns from first choice to last, with numpy.
+
+    Args:
+        ranks (ndarray): B x n ranks, -1 for unranked
+
+    Returns:
+        ndarray: B x n int16 column indices; ties keep column order, and every
+            slot after a ballot's last ranked column holds the sentinel column n
+    """
+    n = ranks.shape[1]
+    # int16 keys let numpy use a radix sort for the stable argsort. Ranks read
+    # from a binary ballot file may be int8, so widen them before the unranked
+    # sentinel is filled in.
+    ranked = ranks != -1
+    keys = np.where(ranked, ranks.astype(np.int16), np.iinfo(np.int16).max)
+    order = np.argsort(keys, axis=1, kind="stable").astype(np.int16)
+    order[~np.take_along_axis(ranked, order, axis=1)] = n
+    return order
+
+
+def advance_choices(order, position, top, usable, ballots):
+    """
+    Move ballots on to their next usable choice, in place.
+
+    Args:
+        order (ndarray): Preference orders from preference_order()
+        position (ndarray): Each ballot's index into its order row
+        top (ndarray): Each ballot's current choice, the sentinel n once it has
+            none left
+        usable (ndarray): n + 1 flags for which columns can still be chosen,
+            with the sentinel column's flag False
+        ballots (ndarray): Indices of the ballots to move
+    """
+    orders = order[ballots]
+    later = np.arange(orders.shape[1]) > position[ballots][:, None]
+    candidates = usable[orders] & later
+    has_next = candidates.any(axis=1)
+    positions = np.where(has_next, candidates.argmax(axis=1), orders.shape[1])
+    position[ballots] = positions
+    top[ballots] = len(usable) - 1
+    top[ballots[has_next]] = orders[has_next, positions[has_next]]
+
+
+class RunoffTally:
+    """
+    Instant runoff vote counts that are maintained as movies are removed.
+
+    Each ballot keeps a pointer to its current top choice, and each movie keeps
+    the ballots whose top choice it currently is. Removing a movie only advances
+    the pointers of the ballots that held it, so first-choice counts stay up to
+    date without rescanning every ballot.
+
+    Vote values follow InstantRunoffMethod's ballot rewriting rules without
+    rewriting anything:
+        - Without reorder, a ballot keeps its original ranks, except that once a
+          ballot's rank 1 is removed its next remaining choice becomes rank 1.
+        - After densify(), every ballot ranks its remaining movies 1, 2, 3, ...
+
+    These match the rewriting rules exactly for ballots that rank at most one
+    movie 1, and, once densify() is called, for ballots ranking every movie with
+    distinct ranks. build_runoff_tally sends other ballots to RewritingRunoffTally.
+
+    This is the pure Python implementation; VectorRunoffTally does the same work
+    with numpy. Use build_runoff_tally to get the best available one.
+
+    Attributes:
+        n (int): Number of candidate columns
+        alive (list): Whether each column is still in the running
+        dense (bool): Whether ballots are treated as reordered
+        first (list): Number of rank 1 votes currently held by each column
+    """
+
+    def __init__(self, ballots):
+        """
+        Build the initial tallies.
+
+        Args:
+            ballots (BallotMatrix): Ballots to count, optionally weighted; they
+                are never modified
+        """
+        self.n = ballots.n
+        self.ballots = ballots
+        self.weights = ballots.weights
+        self.alive = [True] * self.n
+        self.dense = False
+        self._dense_levels = {}
+        self._build()
+
+    def _build(self):
+        n = self.n
+        ranks = self.ballots.ranks
+        self.order = [
+            sorted((col for col in range(n) if votes[col] != -1), key=votes.__getitem__)
+            for votes in self.ballots.rows()
+        ]
+        self.position = [0] * len(self.order)
+        self.holders = [[] for _ in range(n)]
+        self.has_one = []
+        for b, order in enumerate(self.order):
+            self.has_one.append(bool(order) and ranks[b * n + order[0]] == 1)
+            if order:
+                self.holders[order[0]].append(b)
+
+        top = max(max(ranks, default=0), n) + 1
+        self.levels = [[0] * n for _ in range(top)]
+        for b, votes in enumerate(self.ballots.rows()):
+            weight = self._weight(b)
+            for col, vote in enumerate(votes):
+                if vote >= 1:
+                    self.levels[vote][col] += weight
+        self._count_first()
+
+    def _weight(self, b):
+        return self.weights[b] if self.weights is not None else 1
+
+    def _count_first(self):
+        self.first = [0] * self.n
+        for col, holders in enumerate(self.holders):
+            for b in holders:
+                if self.dense or self.has_one[b]:
+                    self.first[col] += self._weight(b)
+
+    def count(self, vote_num, col):
+        """Return the number of ballots currently giving column col the vote vote_num."""
+        if vote_num == 1:
+            return self.first[col]
+        if self.dense:
+            if vote_num not in self._dense_levels:
+                self._dense_levels[vote_num] = self._count_dense_level(vote_num)
+            return self._dense_levels[vote_num][col]
+        if vote_num >= len(self.levels):
+            return 0
+        # Ballots whose rank 1 moved to col no longer give col its original rank
+        return self.levels[vote_num][col] - self._promoted_at(vote_num, col)
+
+    def _promoted_at(self, vote_num, col):
+        n = self.n
+        ranks = self.ballots.ranks
+        return sum(
+            self._weight(b)
+            for b in self.holders[col]
+            if self.has_one[b] and ranks[b * n + col] == vote_num
+        )
+
+    def _count_dense_level(self, vote_num):
+        counts = [0] * self.n
+        alive = self.alive
+        for b, order in enumerate(self.order):
+            seen = 0
+            for i in range(self.position[b], len(order)):
+                col = order[i]
+                if alive[col]:
+                    seen += 1
+                    if seen == vote_num:
+                        counts[col] += self._weight(b)
+                        break
+        return counts
+
+    def remove(self, col):
+        """Remove column col, moving its ballots to their next remaining choice."""
+        self.alive[col] = False
+        self._dense_levels = {}
+        self._advance(col)
+        self.first[col] = 0
+
+    def _advance(self, col):
+        alive = self.alive
+        for b in self.holders[col]:
+            order = self.order[b]
+            i = self.position[b] + 1
+            while i < len(order) and not alive[order[i]]:
+                i += 1
+            self.position[b] = i
+            if i < len(order):
+                top = order[i]
+                self.holders[top].append(b)
+                if self.dense or self.has_one[b]:
+                    self.first[top] += self._weight(b)
+        self.holders[col] = []
+
+    def densify(self):
+        """Treat every ballot as reordered to consecutive ranks from now on."""
+        if not self.dense:
+            self.dense = True
+            self._dense_levels = {}
+            self._count_first()
+
+
+class VectorRunoffTally(RunoffTally):
+    """
+    RunoffTally backed by numpy arrays.
+
+    Each ballot's current top choice is kept in a flat array instead of per-movie
+    holder lists, so removing a movie selects and advances all of its ballots in
+    a few vectorized steps instead of one Python iteration per ballot.
+    """
+
+    def _build(self):
+        n = self.n
+        ranks = self.ballots.to_numpy()
+        num_ballots = len(ranks)
+        self.ranks = ranks
+        self.weight_array = self.ballots.weights_numpy()
+        self.alive_array = np.ones(n + 1, dtype=bool)
+        self.alive_array[n] = False  # Sentinel column for exhausted ballots
+        self.order = preference_order(ranks)
+        self.position = np.zeros(num_ballots, dtype=np.int64)
+        self.top = self.order[:, 0].copy() if n else np.full(num_ballots, n, np.int16)
+        self.has_one = np.zeros(num_ballots, dtype=bool)
+        has_top = self.top < n
+        self.has_one[has_top] = ranks[has_top, self.top[has_top]] == 1
+
+        top = max(int(ranks.max(initial=0)), n) + 1
+        levels = np.zeros((top, n), dtype=self.weight_array.dtype)
+        for col in range(n):
+            column = ranks[:, col]
+            voted = column >= 1
+            levels[:, col] = np.bincount(
+                column[voted], weights=self.weight_array[voted], minlength=top
+            )
+        self.levels = levels.tolist()
+        self._count_first()
+
+    def _first_counts(self, ballots):
+        if not self.dense:
+            ballots = ballots[self.has_one[ballots]]
+        return np.bincount(
+            self.top[ballots], weights=self.weight_array[ballots], minlength=self.n + 1
+        ).astype(self.weight_array.dtype)[: self.n]
+
+    def _count_first(self):
+        self.first = self._first_counts(np.arange(len(self.top))).tolist()
+
+    def _promoted_at(self, vote_num, col):
+        holders = np.flatnonzero(self.top == col)
+        hit = self.has_one[holders] & (self.ranks[holders, col] == vote_num)
+        return self.weight_array[holders[hit]].sum().item()
+
+    def _count_dense_level(self, vote_num):
+        columns = np.arange(self.order.shape[1])
+        remaining = self.alive_array[self.order]
+        remaining &= columns >= self.position[:, None]
+        seen = np.cumsum(remaining, axis=1, dtype=np.int16)
+        rows, cols = np.nonzero(remaining & (seen == vote_num))
+        counts = np.bincount(
+            self.order[rows, cols], weights=self.weight_array[rows], minlength=self.n
+        )
+        return counts.astype(self.weight_array.dtype).tolist()
+
+    def remove(self, col):
+        self.alive_array[col] = False
+        super().remove(col)
+
+    def _advance(self, col):
+        ballots = np.flatnonzero(self.top == col)
+        advance_choices(self.order, self.position, self.top, self.alive_array, ballots)
+        gained = self._first_counts(ballots)
+        for top in np.flatnonzero(gained).tolist():
+            self.first[top] += gained[top].item()
+
+
+class RewritingRunoffTally:
+    """
+    Instant runoff vote counts kept by rewriting each ballot's ranks.
+
+    Applies InstantRunoffMethod's ballot rewriting rules literally, for ballots
+    where RunoffTally's pointers would count differently: ballots ranking
+    several movies 1, and, with reorder, ballots with blanks or repeated ranks.
+        - Removing a movie gives rank 1 to the first remaining movie with the
+          smallest rank above 1 on every ballot that ranked the removed movie 1.
+          A ballot with no such movie keeps no rank 1 and stops counting.
+        - densify() renumbers each ballot's remaining ranks in sorted order.
+          Blanks sort first, so they become the lowest ranks.
+
+    Renumbering always leaves a ranking of 1 to k over the k remaining movies,
+    so after the first densify() the counts are handed over to a RunoffTally.
+
+    This is the pure Python implementation; VectorRewritingRunoffTally does the
+    same work with numpy.
+
+    Attributes:
+        n (int): Number of candidate columns
+    """
+
+    def __init__(self, ballots):
+        """
+        Args:
+            ballots (BallotMatrix): Ballots to count, optionally weighted; they
+                are copied, not modified
+        """
+        self.n = ballots.n
+        self.movies = ballots.movies
+        self.columns = list(range(self.n))  # Remaining columns, in order
+        self.tally = None  # RunoffTally that takes over after densify()
+        self._levels = {}
+        self._load(ballots)
+
+    def _load(self, ballots):
+        self.rows = list(ballots.rows())
+        self.weights = [ballots.weight(b) for b in range(len(ballots))]
+
+    def count(self, vote_num, col):
+        """Return the number of ballots currently giving column col the vote vote_num."""
+        if self.tally is not None:
+            return self.tally.count(vote_num, col)
+        if vote_num not in self._levels:
+            self._levels[vote_num] = self._count_level(vote_num)
+        return self._levels[vote_num][col]
+
+    def _count_level(self, vote_num):
+        counts = [0] * self.n
+        for votes, weight in zip(self.rows, self.weights):
+            for c in self.columns:
+                if votes[c] == vote_num:
+                    counts[c] += weight
+        return counts
+
+    def remove(self, col):
+        """Remove column col, moving its rank 1 votes to each ballot's next choice."""
+        if self.tally is not None:
+            self.tally.remove(col)
+            return
+        self.columns.remove(col)
+        self._transfer(col)
+        self._levels = {}
+
+    def _transfer(self, col):
+        for votes in self.rows:
+            if votes[col] != 1:
+                continue
+            later = [votes[c] for c in self.columns if votes[c] > 1]
+            if later:
+                lowest = min(later)
+                votes[next(c for c in self.columns if votes[c] == lowest)] = 1
+
+    def densify(self):
+        """Renumber every ballot's remaining ranks, then count with a RunoffTally."""
+        if self.tally is not None:
+            self.tally.densify()
+            return
+        self.tally = _fast_tally(self._renumbered())
+        self.tally.densify()
+
+    def _renumbered(self):
+        ranks = array(BallotMatrix.typecode)
+        for votes in self.rows:
+            remaining = [votes[c] for c in self.columns]
+            for i, vote in enumerate(sorted(remaining)):
+                remaining[remaining.index(vote)] = i + 1
+            dense = [-1] * self.n
+            for c, vote in zip(self.columns, remaining):
+                dense[c] = vote
+            ranks.extend(dense)
+        weights = array(BallotMatrix.weight_typecode, self.weights)
+        self.rows = []
+        return BallotMatrix(self.movies, ranks, weights)
+
+
+class VectorRewritingRunoffTally(RewritingRunoffTally):
+    """
+    RewritingRunoffTally backed by a numpy copy of the ranks.
+
+    Removing a movie rewrites all of its rank 1 ballots in a few vectorized
+    steps. Renumbering looks up each ballot's ranks in sorted order, and a
+    lookup can land on a rank that was already renumbered, so it is not a
+    stable sort in general. Blanks sort first and can never be mistaken for a
+    renumbered rank, so they are numbered as a stable sort would; the lookups
+    for the remaining ranks are replayed one step at a time across all ballots.
+    """
+
+    def _load(self, ballots):
+        self.ranks = ballots.to_numpy().astype(np.int16)
+        self.weight_array = ballots.weights_numpy()
+        self.active = np.ones(self.n, dtype=bool)
+
+    def _count_level(self, vote_num):
+        rows, cols = np.nonzero(self.ranks[:, self.active] == vote_num)
+        counts = np.zeros(self.n, dtype=self.weight_array.dtype)
+        counts[self.active] = np.bincount(
+            cols, weights=self.weight_array[rows], minlength=len(self.columns)
+        )
+        return counts.tolist()
+
+    def _transfer(self, col):
+        self.active[col] = False
+        rows = np.flatnonzero(self.ranks[:, col] == 1)
+        later = self.ranks[rows]
+        keys = np.where((later > 1) & self.active, later, np.iinfo(np.int16).max)
+        # argmin picks the first remaining column holding the smallest rank
+        lowest = keys.argmin(axis=1)
+        found = keys[np.arange(len(rows)), lowest] < np.iinfo(np.int16).max
+        self.ranks[rows[found], lowest[found]] = 1
+
+    def _renumbered(self):
+        remaining = self.ranks[:, self.active]
+        k = remaining.shape[1]
+        order = np.argsort(remaining, axis=1, kind="stable")
+        in_order = np.take_along_axis(remaining, order, axis=1)
+        stable = np.empty_like(remaining)
+        np.put_along_axis(stable, order, np.arange(1, k + 1, dtype=np.int16), axis=1)
+        renumbered = np.where(remaining < 1, stable, remaining)
+        blanks = (in_order < 1).sum(axis=1)
+        for i in range(blanks.min(initial=k), k):
+            rows = np.flatnonzero(blanks <= i)
+            # list.index: the first entry equal to the vote, renumbered or not
+            hit = (renumbered[rows] == in_order[rows, i, None]).argmax(axis=1)
+            renumbered[rows, hit] = i + 1
+        dense = np.full(self.ranks.shape, -1, dtype=np.int16)
+        dense[:, self.active] = renumbered
+        self.ranks = None
+        return _matrix_from_numpy(self.movies, dense, self.weight_array)
+
+
+class CombinedRunoffTally:
+    """Sum of several runoff tallies over disjoint sets of ballots."""
+
+    def __init__(self, tallies):
+        self.tallies = tallies
+        self.n = tallies[0].n
+
+    def count(self, vote_num, col):
+        return sum(tally.count(vote_num, col) for tally in self.tallies)
+
+    def remove(self, col):
+        for tally in self.tallies:
+            tally.remove(col)
+
+    def densify(self):
+        for tally in self.tallies:
+            tally.densify()
+
+
+def _fast_tally(ballots):
+    if np is not None:
+        return VectorRunoffTally(ballots)
+    return RunoffTally(ballots)
+
+
+def _rewriting_tally(ballots):
+    if np is not None:
+        return VectorRewritingRunoffTally(ballots)
+    return RewritingRunoffTally(ballots)
+
+
+def _split_rows(ballots, reorder):
+    """
+    Split row indices by whether RunoffTally counts them like the rewriting rules.
+
+    Returns:
+        tuple: (kept, rewritten) row indices, as numpy arrays when available
+    """
+    if np is not None:
+        ranks = ballots.to_numpy()
+        rewritten = (ranks == 1).sum(axis=1) > 1
+        if reorder:
+            repeated = (np.diff(np.sort(ranks, axis=1), axis=1) == 0).any(axis=1)
+            rewritten |= (ranks < 1).any(axis=1) | repeated
+        return np.flatnonzero(~rewritten), np.flatnonzero(rewritten)
+    kept, rewritten = [], []
+    for b, votes in enumerate(ballots.rows()):
+        irregular = votes.count(1) > 1
+        if reorder:
+            irregular = irregular or min(votes, default=1) < 1
+            irregular = irregular or len(set(votes)) < len(votes)
+        (rewritten if irregular else kept).append(b)
+    return kept, rewritten
+
+
+def _matrix_from_numpy(movies, ranks, weights):
+    packed = array(BallotMatrix.typecode)
+    packed.frombytes(np.ascontiguousarray(ranks, dtype=np.int16).tobytes())
+    packed_weights = array(BallotMatrix.weight_typecode)
+    packed_weights.frombytes(np.ascontiguousarray(weights, dtype=np.int64).tobytes())
+    return BallotMatrix(movies, packed, packed_weights)
+
+
+def _take_rows(ballots, rows):
+    if np is not None:
+        return _matrix_from_numpy(
+            ballots.movies, ballots.to_numpy()[rows], ballots.weights_numpy()[rows]
+        )
+    ranks = array(ballots.typecode)
+    for b in rows:
+        ranks.extend(ballots.ranks[b * ballots.n : (b + 1) * ballots.n])
+    weights = array(BallotMatrix.weight_typecode, (ballots.weight(b) for b in rows))
+    return BallotMatrix(ballots.movies, ranks, weights)
+
+
+def build_runoff_tally(ballots, reorder=False):
+    """
+    Return the fastest runoff tally that counts a BallotMatrix exactly.
+
+    Args:
+        ballots (BallotMatrix): Ballots to count
+        reorder (bool): Whether densify() will be called after removals
+    """
+    kept, rewritten = _split_rows(ballots, reorder)
+    if not len(rewritten):
+        return _fast_tally(ballots)
+    slow = _rewriting_tally(_take_rows(ballots, rewritten))
+    if not len(kept):
+        return slow
+    return CombinedRunoffTally([_fast_tally(_take_rows(ballots, kept)), slow])
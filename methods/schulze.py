@@ -1,4 +1,6 @@
-from .voting_method import VotingMethod
+from .voting_method import VotingMethod, candidate_label
+from .pairwise import PairwiseMatrix, tally_pairwise
+from .paths import condorcet_winner, smith_set, widest_paths
 
 
 class SchulzeMethod(VotingMethod):
@@ -14,22 +16,44 @@ class SchulzeMethod(VotingMethod):
         n (int): Number of candidates/movies
         d (list): 2D matrix storing direct pairwise preferences
         p (list): 2D matrix storing strongest paths between candidates
+        condorcet_winner (str): Candidate who beats every other head to head,
+            or None, set by process_ballots and shown by get_debug
+        smith_set (list): Smallest group of candidates who each beat everyone
+            outside it, set by process_ballots and shown by get_debug
     """
 
+    reusable = True
+
     def __init__(self, movies, ballots, **kwargs):
         """
         Initialize the Schulze method calculator.
 
         Args:
             movies (list): List of movie candidates
-            ballots (list): List of Ballot objects containing voter preferences
+            ballots (list | BallotMatrix): Ballots containing voter preferences
             **kwargs: Additional arguments passed to parent class
+                vectorize (bool): Force or disable the numpy pairwise tally.
+                    Defaults to numpy when it is installed.
+                workers (int): Processes to split the pairwise tally across.
+                    Defaults to the CPU count for very large ballot sets only.
+                group (bool): Collapse identical rankings before tallying.
+                    Defaults to True.
+                vectorize_paths (bool): Force or disable the numpy path search.
+                    Defaults to numpy for VECTORIZE_MIN_CANDIDATES or more movies.
+                profiler (Profiler): Records the tally, path and ranking phases.
         """
         super().__init__(movies, ballots, **kwargs)
         self.n = len(movies)
+        self.vectorize = kwargs.get("vectorize", None)
+        self.workers = kwargs.get("workers", None)
+        self.vectorize_paths = kwargs.get("vectorize_paths", None)
         self.d = [[0 for i in range(self.n)] for j in range(self.n)]
         self.p = [[0 for i in range(self.n)] for j in range(self.n)]
         self.processed = False  # Flag to track if process_ballots has been run
+        self.tallied = False  # Whether d holds the tally of the current ballots
+        self.paths_stale = True  # Whether d has changed since p was computed
+        self.condorcet_winner = None
+        self.smith_set = []
 
     def score_pairwise(self):
         """
@@ -37,14 +61,66 @@ class SchulzeMethod(VotingMethod):
 
         For each pair of candidates (i,j), counts how many voters preferred i over j
         by comparing their rankings. Results are stored in the d matrix.
+        Uses the batched numpy tally when available, otherwise plain Python, and
+        counts each distinct ranking once with its weight. The tally is shared
+        through PairwiseMatrix with other methods run on the same ballots.
+        """
+        with self.profiler.phase("score_pairwise"):
+            pairwise = PairwiseMatrix.for_ballots(
+                self.movies,
+                self.ballots,
+                group=self.group,
+                vectorize=self.vectorize,
+                workers=self.workers,
+            )
+            self.d = pairwise.counts()
+        self.tallied = True
+        self.paths_stale = True
+
+    def _apply_tally(self, ballots, sign):
+        if not self.tallied:
+            self.score_pairwise()
+        delta = tally_pairwise(
+            ballots, self.n, vectorize=self.vectorize, workers=self.workers
+        )
+        changed = False
+        for i in range(self.n):
+            for j in range(self.n):
+                if delta[i][j]:
+                    self.d[i][j] += sign * delta[i][j]
+                    changed = True
+        if changed:
+            self.paths_stale = True
+
+    def add_ballots(self, ballots):
+        """
+        Count additional ballots without re-tallying the ones already counted.
+
+        Only the new ballots are tallied, in O(k * n^2) for k ballots, and their
+        counts are added to d. Paths are recomputed by the next process_ballots()
+        only if d actually changed. self.ballots is not modified; d and p always
+        reflect the initial ballots plus any added and minus any removed.
+
+        Args:
+            ballots (list | BallotMatrix): Ballots to add
+        """
+        self._apply_tally(ballots, 1)
+
+    def remove_ballots(self, ballots):
+        """
+        Stop counting ballots that were previously counted.
+
+        Args:
+            ballots (list | BallotMatrix): Ballots to remove, with the same
+                rankings as ballots that were counted earlier
+
+        Raises:
+            ValueError: If removing them would leave a negative preference count
         """
-        # For each pair of candidates, count how many voters prefer i over j
-        for ballot in self.ballots:
-            for i in range(self.n):
-                for j in range(self.n):
-                    if i != j and ballot.votes[i] != -1 and ballot.votes[j] != -1:
-                        if ballot.votes[i] < ballot.votes[j]:
-                            self.d[i][j] += 1
+        self._apply_tally(ballots, -1)
+        if any(count < 0 for row in self.d for count in row):
+            self._apply_tally(ballots, 1)
+            raise ValueError("Cannot remove ballots that were never counted")
 
     def compute_paths(self):
         """
@@ -53,24 +129,19 @@ class SchulzeMethod(VotingMethod):
         Uses the Floyd-Warshall algorithm to find the strongest path between each
         pair of candidates. A path's strength is equal to the minimum pairwise
         victory along that path. Results are stored in the p matrix.
-        """
-        # Find strongest paths between each pair using Floyd-Warshall algorithm
-        for i in range(self.n):
-            for j in range(self.n):
-                if i != j:
-                    if self.d[i][j] > self.d[j][i]:
-                        self.p[i][j] = self.d[i][j]
-                    else:
-                        self.p[i][j] = 0
+        Large candidate sets use a vectorized numpy update per intermediate.
 
-        for i in range(self.n):
-            for j in range(self.n):
-                if i != j:
-                    for k in range(self.n):
-                        if i != k and j != k:
-                            self.p[j][k] = max(
-                                self.p[j][k], min(self.p[j][i], self.p[i][k])
-                            )
+        The Condorcet winner and Smith set are also found from d, in O(n^2), and
+        reported by get_debug. Every path is still computed, since each
+        candidate's margin sum decides the full ranking.
+        """
+        with self.profiler.phase("compute_paths", candidates=self.n):
+            winner = condorcet_winner(self.d)
+            self.condorcet_winner = None if winner is None else self.movies[winner]
+            self.smith_set = [self.movies[i] for i in smith_set(self.d)]
+            self.p = widest_paths(self.d, vectorize=self.vectorize_paths)
+            self.profiler.count("intermediates", self.n)
+        self.paths_stale = False
 
     def _get_strength_grid(self):
         """
@@ -89,32 +160,34 @@ class SchulzeMethod(VotingMethod):
         RED = "\033[91m"
         RESET = "\033[0m"
 
-        lines = []
-        lines.append("Pairwise Strength Grid:")
+        labels = [candidate_label(i) for i in range(self.n)]
+        label_width = max((len(label) for label in labels), default=1)
+        largest = max((count for row in self.d for count in row), default=0)
+        width = max(3, label_width + 1, len(str(largest)) + 1)
+
+        lines = ["Pairwise Strength Grid:"]
 
         # Header row with movie letters
-        header = " " * 3
-        for i in range(self.n):
-            header += f"{chr(65 + i):>3}"
-        lines.append(header)
-        lines.append("   " + "-" * self.n * 3)
+        pad = " " * (label_width + 2)
+        lines.append(pad + "".join(f"{label:>{width}}" for label in labels))
+        lines.append(pad + "-" * self.n * width)
 
         # Each row with strength scores
         for i in range(self.n):
-            row = f"{chr(65 + i)} |"
+            cells = [f"{labels[i]:<{label_width}} |"]
             for j in range(self.n):
                 if i == j:
-                    row += f"{'-':>3}"
+                    cells.append(f"{'-':>{width}}")
+                    continue
+                if self.d[i][j] > self.d[j][i]:
+                    color = GREEN
+                elif self.d[i][j] < self.d[j][i]:
+                    color = RED
                 else:
-                    if self.d[i][j] > self.d[j][i]:
-                        color = GREEN
-                    elif self.d[i][j] < self.d[j][i]:
-                        color = RED
-                    else:
-                        color = ""
-                    row += f"{color}{self.d[i][j]:3}{RESET}"
-            row += f" | {chr(65 + i)}: {self.movies[i]}"
-            lines.append(row)
+                    color = ""
+                cells.append(f"{color}{self.d[i][j]:{width}}{RESET}")
+            cells.append(f" | {labels[i]}: {self.movies[i]}")
+            lines.append("".join(cells))
 
         return "\n".join(lines) + "\n"
 
@@ -122,8 +195,9 @@ class SchulzeMethod(VotingMethod):
         """
         Generate a formatted string showing the final preference ordering based on the p matrix.
 
-        Candidates are represented by letters (A, B, C, etc.). Tied candidates
-        are grouped in blue-colored brackets.
+        Candidates are represented by letters (A, B, C, ..., Z, AA, AB, etc.),
+        separated by spaces once there are more than 26. Tied candidates are
+        grouped in blue-colored brackets.
 
         Returns:
             str: Formatted string showing the complete preference order
@@ -132,33 +206,53 @@ class SchulzeMethod(VotingMethod):
         BLUE = "\033[94m"
         RESET = "\033[0m"
 
-        # Build result string
-        result = "Preference Order: "
+        index = {movie: i for i, movie in enumerate(self.movies)}
+        separator = " " if self.n > 26 else ""
+        parts = []
         scores = sorted(self.score_groups.keys(), reverse=True)
 
         # Process candidates in order of strength
         for score in scores:
             candidates = self.score_groups[score]
+            labels = [candidate_label(index[movie]) for movie in candidates]
             if len(candidates) > 1:
                 # Handle ties - always show in brackets
-                tied_letters = [
-                    chr(65 + self.movies.index(movie)) for movie in candidates
-                ]
-                result += f"{BLUE}[{''.join(sorted(tied_letters))}]{RESET}"
+                tied = separator.join(
+                    sorted(labels, key=lambda label: (len(label), label))
+                )
+                parts.append(f"{BLUE}[{tied}]{RESET}")
             else:
                 # Single candidate
-                candidate = candidates[0]
-                result += chr(65 + self.movies.index(candidate))
+                parts.append(labels[0])
+
+        return "Preference Order: " + separator.join(parts) + "\n"
 
-        return result + "\n"
+    def _get_smith_summary(self):
+        """
+        Generate a formatted string naming the Condorcet winner and Smith set.
+
+        Returns:
+            str: One line for the Condorcet winner (or "none") and one listing
+                the Smith set's candidate letters
+        """
+        index = {movie: i for i, movie in enumerate(self.movies)}
+        separator = " " if self.n > 26 else ""
+        if self.condorcet_winner is None:
+            winner = "none"
+        else:
+            winner = candidate_label(index[self.condorcet_winner])
+        members = separator.join(
+            candidate_label(index[movie]) for movie in self.smith_set
+        )
+        return f"Condorcet Winner: {winner}\nSmith Set: {members}\n"
 
     def process_ballots(self):
         """
         Process all ballots to determine winners and losers using the Schulze method.
 
         The method:
-        1. Calculates pairwise preferences
-        2. Computes strongest paths
+        1. Calculates pairwise preferences, unless already tallied
+        2. Computes strongest paths, unless d is unchanged since the last run
         3. Determines victory strength for each candidate
         4. Groups candidates by score to handle ties
         5. Separates winners and losers based on victory strength
@@ -168,9 +262,15 @@ class SchulzeMethod(VotingMethod):
                 - winners: List of winning candidates (or nested lists for ties)
                 - losers: List of remaining candidates in order of preference
         """
-        self.score_pairwise()
-        self.compute_paths()
-
+        if not self.tallied:
+            self.score_pairwise()
+        if self.paths_stale:
+            self.compute_paths()
+        self.tie = False
+        with self.profiler.phase("rank"):
+            return self._rank()
+
+    def _rank(self):
         # Calculate strength of victory for each candidate
         self.strength_scores = []
         for i in range(self.n):
@@ -232,7 +332,8 @@ class SchulzeMethod(VotingMethod):
 
     def get_debug(self):
         """
-        Generate debug information combining the strength grid and preference order.
+        Generate debug information combining the strength grid, preference order,
+        Condorcet winner and Smith set.
         Returns a warning if process_ballots hasn't been run first.
 
         Returns:
@@ -241,4 +342,10 @@ class SchulzeMethod(VotingMethod):
         if not self.processed:
             return "Warning: Must run process_ballots() before getting debug information.\n"
 
-        return "\n".join([self._get_strength_grid(), self._get_preference_order()])
+        return "\n".join(
+            [
+                self._get_strength_grid(),
+                self._get_preference_order(),
+                self._get_smith_summary(),
+            ]
+        )
@@ -0,0 +1,160 @@
+import random
+from fractions import Fraction
+from .voting_method import VotingMethod
+from .stv_tally import build_transfer_tally
+from domain import BallotMatrix
+
+
+class STVMethod(VotingMethod):
+    """
+    Implementation of the single transferable vote, for proportional results when
+    more than one movie is selected.
+
+    Each round, a movie whose total reaches the Droop quota is elected and the
+    surplus above the quota is passed on to the next choices of its ballots at a
+    fractional value (Gregory method). If no movie reaches the quota, the movie
+    with the lowest total is excluded and its ballots are passed on at full
+    value. Ties are broken by the totals of the most recent round in which the
+    tied movies differed, and randomly if they never did. Totals are exact
+    Fractions, so comparisons with the quota and between tied movies are never
+    decided by rounding.
+
+    Attributes:
+        quota (int): Droop quota, floor(valid ballots / (seats + 1)) + 1
+        elected (list): Elected movies, in the order they were elected
+        excluded (list): Excluded movies, in the order they were excluded
+        rounds (list): One dict per round with the totals and what happened
+    """
+
+    def __init__(self, movies, ballots, **kwargs):
+        """
+        Initialize the STV calculator.
+
+        Args:
+            movies (list): List of movie candidates
+            ballots (list | BallotMatrix): Ballots containing voter preferences
+            **kwargs: Additional arguments passed to parent class
+        """
+        super().__init__(movies, ballots, **kwargs)
+        if not isinstance(ballots, BallotMatrix):
+            self.ballots = BallotMatrix.from_ballots(movies, ballots)
+        self.n = len(movies)
+        self.seats = min(self.num_winners, self.n)
+        with self.profiler.phase("stv_setup"):
+            self.tally = build_transfer_tally(self.ballot_groups())
+        self.quota = int(self.tally.valid // (self.seats + 1)) + 1
+        self.elected = []
+        self.excluded = []
+        self.rounds = []
+        self.processed = False  # Flag to track if process_ballots has been run
+
+    def _break_tie(self, tied, highest):
+        """Pick one movie from tied, preferring higher (or lower) earlier totals."""
+        for past in reversed(self.rounds[:-1]):
+            totals = past["totals"]
+            best = (max if highest else min)(totals[c] for c in tied)
+            tied = [c for c in tied if totals[c] == best]
+            if len(tied) == 1:
+                return tied[0]
+        if len(tied) > 1:
+            self.tie = True
+            return random.choice(tied)
+        return tied[0]
+
+    def _run_round(self, record):
+        totals = list(self.tally.totals)
+        continuing = [c for c in range(self.n) if self.tally.continuing[c]]
+        self.rounds.append({"totals": totals, "elected": [], "excluded": []})
+        round_info = self.rounds[-1]
+
+        open_seats = self.seats - len(self.elected)
+        if len(continuing) <= open_seats:
+            # Every continuing movie fills a remaining seat
+            for c in sorted(continuing, key=lambda c: -totals[c]):
+                self.elected.append(c)
+                round_info["elected"].append(c)
+                self.tally.continuing[c] = False
+            record["elected"] = [self.movies[c] for c in round_info["elected"]]
+            return
+
+        reached = [c for c in continuing if totals[c] >= self.quota]
+        if reached:
+            top = max(totals[c] for c in reached)
+            c = self._break_tie([c for c in reached if totals[c] == top], True)
+            self.elected.append(c)
+            round_info["elected"].append(c)
+            record["elected"] = [self.movies[c]]
+            if len(self.elected) < self.seats:
+                self.tally.transfer(c, Fraction(totals[c] - self.quota) / totals[c])
+            else:
+                self.tally.continuing[c] = False
+        else:
+            lowest = min(totals[c] for c in continuing)
+            c = self._break_tie([c for c in continuing if totals[c] == lowest], False)
+            self.excluded.append(c)
+            round_info["excluded"].append(c)
+            record["excluded"] = [self.movies[c]]
+            self.tally.transfer(c)
+
+    def process_ballots(self):
+        """
+        Elect num_winners movies by single transferable vote.
+
+        Returns:
+            tuple: (winners, losers) where:
+                - winners: Elected movies, in the order they were elected
+                - losers: Movies that were neither elected nor excluded, highest
+                    total first, then excluded movies, last excluded first
+        """
+        if not self.processed:
+            self.tie = False
+            while len(self.elected) < self.seats:
+                with self.profiler.phase(
+                    "stv_round", round=len(self.rounds) + 1
+                ) as record:
+                    self._run_round(record)
+            self.processed = True
+
+        remaining = [
+            c for c in range(self.n) if c not in self.elected and c not in self.excluded
+        ]
+        totals = self.tally.totals
+        remaining.sort(key=lambda c: -totals[c])
+        winners = [self.movies[c] for c in self.elected]
+        losers = [self.movies[c] for c in remaining + self.excluded[::-1]]
+        return winners, losers
+
+    def get_rounds(self):
+        return [
+            {
+                "totals": {
+                    self.movies[c]: float(total)
+                    for c, total in enumerate(info["totals"])
+                    if total
+                },
+                "elected": [self.movies[c] for c in info["elected"]],
+                "excluded": [self.movies[c] for c in info["excluded"]],
+            }
+            for info in self.rounds
+        ]
+
+    def get_debug(self):
+        if not self.processed:
+            return "Warning: Must run process_ballots() before getting debug information.\n"
+
+        width = max((len(movie) for movie in self.movies), default=0)
+        lines = [
+            f"Valid ballots: {self.tally.valid:g}, seats: {self.seats}, "
+            f"quota: {self.quota}"
+        ]
+        for r, info in enumerate(self.rounds):
+            actions = [f"elected {self.movies[c]}" for c in info["elected"]]
+            actions += [f"excluded {self.movies[c]}" for c in info["excluded"]]
+            lines.append(f"Round {r + 1}: {', '.join(actions)}")
+            for c in sorted(range(self.n), key=lambda c: -info["totals"][c]):
+                if info["totals"][c]:
+                    lines.append(
+                        f"{' ':>4}{self.movies[c]:<{width}}  {float(info['totals'][c]):.2f}"
+                    )
+        lines.append(f"Exhausted: {float(self.tally.exhausted):.2f}")
+        return "\n".join(lines) + "\n"
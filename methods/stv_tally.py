@@ -0,0 +1,166 @@
+from .runoff_tally import advance_choices, preference_order
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency
+    np = None
+
+
+class TransferTally:
+    """
+    Single transferable vote totals that are maintained as movies are elected or
+    excluded.
+
+    Every ballot carries a value, starting at its weight, and sits on the pile of
+    its highest ranked continuing movie. Electing or excluding a movie only moves
+    the ballots on that movie's pile to their next continuing choice, scaling
+    their values by a transfer factor, so totals stay up to date without
+    rescanning every ballot.
+
+    Ballots that rank nothing are not counted at all. Ballots that run out of
+    continuing choices are exhausted and their value is kept in exhausted.
+
+    Values are exact: whole ballots are ints and transferred surpluses are
+    Fractions, so totals never pick up rounding noise and every implementation
+    elects and excludes the same movies.
+
+    This is the pure Python implementation; VectorTransferTally does the same
+    work with numpy. Use build_transfer_tally to get the best available one.
+
+    Attributes:
+        n (int): Number of candidate columns
+        continuing (list): Whether each column can still receive transfers
+        totals (list): Value currently held by each column, an int or Fraction
+        valid (int): Total value of ballots that rank at least one movie
+        exhausted (Fraction): Value of ballots with no continuing choice left
+    """
+
+    def __init__(self, ballots):
+        """
+        Build the initial first-choice totals.
+
+        Args:
+            ballots (BallotMatrix): Ballots to count, optionally weighted; they
+                are never modified
+        """
+        self.n = ballots.n
+        self.ballots = ballots
+        self.continuing = [True] * self.n
+        self.exhausted = 0
+        self._build()
+        self.valid = sum(self.totals)
+
+    def _build(self):
+        n = self.n
+        self.order = []
+        self.values = []
+        self.position = []
+        self.piles = [[] for _ in range(n)]
+        self.totals = [0] * n
+        for b, votes in enumerate(self.ballots.rows()):
+            order = sorted(
+                (col for col in range(n) if votes[col] != -1), key=votes.__getitem__
+            )
+            if not order:
+                continue
+            weight = self.ballots.weight(b)
+            self.piles[order[0]].append(len(self.order))
+            self.totals[order[0]] += weight
+            self.order.append(order)
+            self.values.append(weight)
+            self.position.append(0)
+
+    def transfer(self, col, factor=1):
+        """
+        Stop counting column col and pass its ballots on.
+
+        Args:
+            col (int): Column that was elected or excluded
+            factor (Fraction): Share of each ballot's value that is transferred;
+                the surplus over the quota divided by the total for an elected
+                movie, 1 for an excluded one
+        """
+        self.continuing[col] = False
+        continuing = self.continuing
+        for b in self.piles[col]:
+            value = self.values[b] * factor
+            self.values[b] = value
+            order = self.order[b]
+            i = self.position[b] + 1
+            while i < len(order) and not continuing[order[i]]:
+                i += 1
+            self.position[b] = i
+            if i < len(order):
+                self.piles[order[i]].append(b)
+                self.totals[order[i]] += value
+            else:
+                self.exhausted += value
+        self.piles[col] = []
+        self.totals[col] = 0
+
+
+class VectorTransferTally(TransferTally):
+    """
+    TransferTally backed by numpy arrays.
+
+    Each ballot's current choice is kept in a flat array instead of per-movie
+    piles, so a transfer selects and advances all of a movie's ballots in a few
+    vectorized steps instead of one Python iteration per ballot.
+
+    A ballot's value is its integer weight times one of a few exact multipliers,
+    one for each distinct series of surplus transfers, so the arrays hold only
+    integers and Fractions are only used once per column and multiplier.
+    """
+
+    def _build(self):
+        n = self.n
+        ranks = self.ballots.to_numpy()
+        counted = (ranks != -1).any(axis=1)
+        ranks = ranks[counted]
+        self.weight_array = self.ballots.weights_numpy()[counted]
+        self.multipliers = [1]
+        self.share = np.zeros(len(ranks), dtype=np.int64)  # Index into multipliers
+        self.continuing_array = np.ones(n + 1, dtype=bool)
+        self.continuing_array[n] = False  # Sentinel column for exhausted ballots
+        self.order = preference_order(ranks)
+        self.position = np.zeros(len(self.order), dtype=np.int64)
+        self.top = self.order[:, 0].copy() if n else np.zeros(0, np.int16)
+        self.totals = [0] * n
+        self._add_values(np.arange(len(self.top)))
+
+    def _add_values(self, ballots):
+        """Add the values of ballots to the totals of their current choices."""
+        keys = self.top[ballots].astype(np.int64) * len(self.multipliers)
+        keys += self.share[ballots]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse, weights=self.weight_array[ballots])
+        for key, weight in zip(keys.tolist(), weights.astype(np.int64).tolist()):
+            top, share = divmod(key, len(self.multipliers))
+            value = self.multipliers[share] * weight
+            if top == self.n:
+                self.exhausted += value
+            else:
+                self.totals[top] += value
+
+    def transfer(self, col, factor=1):
+        self.continuing[col] = False
+        self.continuing_array[col] = False
+        ballots = np.flatnonzero(self.top == col)
+        if factor != 1:
+            shares, inverse = np.unique(self.share[ballots], return_inverse=True)
+            self.share[ballots] = len(self.multipliers) + inverse
+            self.multipliers.extend(
+                self.multipliers[s] * factor for s in shares.tolist()
+            )
+        advance_choices(
+            self.order, self.position, self.top, self.continuing_array, ballots
+        )
+        self._add_values(ballots)
+        self.totals[col] = 0
+
+
+def build_transfer_tally(ballots):
+    """Return the fastest available TransferTally for a BallotMatrix."""
+    if np is not None:
+        return VectorTransferTally(ballots)
+    return TransferTally(ballots)
@@ -0,0 +1,199 @@
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from domain import BallotMatrix, as_ballot_matrix
+from .method_factory import VotingMethodFactory
+from .pairwise import PairwiseMatrix
+from .paths import condorcet_winner, smith_set
+
+
+class ElectionResult:
+    """
+    Outcome of one tabulation, as plain data.
+
+    Attributes:
+        method (str): Name of the voting method, as for VotingMethodFactory
+        movies (list): Candidate titles
+        num_ballots (int): Number of ballots counted
+        winners (list): Winning movies, with tied movies grouped in nested lists
+        losers (list): Remaining movies in order, tied movies grouped likewise
+        tie (bool): Whether the method reported a tie
+        ties (list): Every group of tied movies among winners and losers
+        rounds (list): Per-round data for round-based methods (see get_rounds)
+        pairwise (list): n x n matrix where pairwise[i][j] is the number of voters
+            ranking movies[i] above movies[j], or None if it was not computed
+        paths (list): Schulze strongest path strengths, or None for other methods
+        condorcet_winner (str): Movie that beats every other head to head, or
+            None if there is none or the pairwise matrix was not computed
+        smith_set (list): Smallest group of movies who each beat everyone
+            outside it, or None if the pairwise matrix was not computed
+    """
+
+    def __init__(self, method, movies, num_ballots, winners, losers, **kwargs):
+        self.method = method
+        self.movies = list(movies)
+        self.num_ballots = num_ballots
+        self.winners = winners
+        self.losers = losers
+        self.tie = kwargs.get("tie", False)
+        self.ties = [group for group in winners + losers if isinstance(group, list)]
+        self.rounds = kwargs.get("rounds", [])
+        self.pairwise = kwargs.get("pairwise")
+        self.paths = kwargs.get("paths")
+        self.condorcet_winner = kwargs.get("condorcet_winner")
+        self.smith_set = kwargs.get("smith_set")
+
+    def to_dict(self):
+        """Return the result as a JSON-serializable dict."""
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return f"ElectionResult[{self.method}: {self.winners}]"
+
+
+def _as_matrix(movies, ballots):
+    if isinstance(ballots, BallotMatrix):
+        return ballots
+    if movies is None:
+        raise ValueError("movies are required unless ballots is a BallotMatrix")
+    if ballots and isinstance(ballots[0], (list, tuple)):
+        matrix = BallotMatrix(movies)
+        matrix.extend(ballots)
+        return matrix
+    return as_ballot_matrix(movies, ballots)
+
+
+class Tabulator:
+    """
+    Runs tabulations in process, without printing or touching any files.
+
+    Methods that can process the same ballots again (VotingMethod.reusable,
+    e.g. Schulze and the other pairwise methods) are kept in a small LRU keyed
+    on the ballots' digest, the method and its options, so repeating a
+    tabulation only reruns the final ranking. Pairwise tallies are also shared
+    through PairwiseMatrix. A Tabulator can be used from several threads.
+
+    Attributes:
+        cache_size (int): Number of method instances kept for reuse
+    """
+
+    def __init__(self, cache_size=32):
+        self.cache_size = cache_size
+        self._methods = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _method(self, method_str, ballots, num_winners, options):
+        create = functools.partial(
+            VotingMethodFactory.create_method,
+            method_str,
+            ballots.movies.copy(),
+            ballots,
+            num_winners=num_winners,
+            **options,
+        )
+        if not self.cache_size:
+            return create(), threading.Lock()
+        key = (ballots.digest(), method_str, tuple(sorted(options.items())))
+        with self._lock:
+            if key in self._methods:
+                self._methods.move_to_end(key)
+                return self._methods[key]
+        entry = (create(), threading.Lock())
+        if not entry[0].reusable:
+            return entry
+        with self._lock:
+            entry = self._methods.setdefault(key, entry)
+            while len(self._methods) > self.cache_size:
+                self._methods.popitem(last=False)
+        return entry
+
+    def tabulate(self, ballots, method="schulze", movies=None, **kwargs):
+        """
+        Tabulate ballots and return the structured result.
+
+        Args:
+            ballots (BallotMatrix | list): A ballot matrix, Ballot objects, or
+                lists of ranks (-1 for unranked) in movie order
+            method (str): Voting method name, as for VotingMethodFactory
+            movies (list): Candidate titles, required unless ballots is a matrix
+            **kwargs:
+                num_winners (int): Number of winners to select. Defaults to 1.
+                pairwise (bool): Include the pairwise matrix even for methods
+                    that do not use it. Defaults to False.
+                Other keyword arguments are passed on to the voting method.
+
+        Returns:
+            ElectionResult: The winners, losers, ties, rounds and matrices
+        """
+        ballots = _as_matrix(movies, ballots)
+        num_winners = kwargs.pop("num_winners", 1)
+        include_pairwise = kwargs.pop("pairwise", False)
+        voting_method, lock = self._method(method, ballots, num_winners, kwargs)
+        with lock:
+            voting_method.num_winners = num_winners
+            winners, losers = voting_method.process_ballots()
+            d = getattr(voting_method, "d", None)
+            if d is None and include_pairwise:
+                d = PairwiseMatrix.for_ballots(ballots.movies, ballots).d
+            p = getattr(voting_method, "p", None)
+            winner, smith = None, None
+            if d is not None:
+                winner = condorcet_winner(d)
+                winner = None if winner is None else ballots.movies[winner]
+                smith = [ballots.movies[i] for i in smith_set(d)]
+            return ElectionResult(
+                method,
+                ballots.movies,
+                ballots.num_ballots,
+                winners,
+                losers,
+                tie=voting_method.tie,
+                rounds=voting_method.get_rounds(),
+                pairwise=None if d is None else [row.copy() for row in d],
+                paths=None if p is None else [row.copy() for row in p],
+                condorcet_winner=winner,
+                smith_set=smith,
+            )
+
+    async def tabulate_async(self, ballots, method="schulze", movies=None, **kwargs):
+        """
+        Run tabulate() in an executor so the event loop is never blocked.
+
+        Args:
+            executor (Executor): Where to run the tabulation. Defaults to the
+                loop's default thread pool; pass a ProcessPoolExecutor to use
+                several cores. Worker processes tabulate with their own shared
+                Tabulator, not this one, so each process has its own caches.
+            Other arguments are the same as for tabulate().
+        """
+        executor = kwargs.pop("executor", None)
+        if isinstance(executor, ProcessPoolExecutor):
+            # A Tabulator holds locks and cannot be pickled; send only the ballots
+            ballots = _as_matrix(movies, ballots)
+            if isinstance(ballots.ranks, memoryview) or isinstance(
+                ballots.weights, memoryview
+            ):
+                ballots = ballots.copy()  # Memory-mapped buffers cannot be pickled
+            call = functools.partial(_tabulate_in_worker, ballots, method, kwargs)
+        else:
+            call = functools.partial(self.tabulate, ballots, method, movies, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+
+_default_tabulator = Tabulator()
+
+
+def _tabulate_in_worker(ballots, method, kwargs):
+    return _default_tabulator.tabulate(ballots, method, **kwargs)
+
+
+def tabulate(ballots, method="schulze", movies=None, **kwargs):
+    """Tabulate ballots with a shared Tabulator; see Tabulator.tabulate."""
+    return _default_tabulator.tabulate(ballots, method, movies, **kwargs)
+
+
+async def tabulate_async(ballots, method="schulze", movies=None, **kwargs):
+    """Tabulate ballots off the event loop; see Tabulator.tabulate_async."""
+    return await _default_tabulator.tabulate_async(ballots, method, movies, **kwargs)
@@ -1,12 +1,39 @@
 from abc import ABC, abstractmethod
+from domain import NULL_PROFILER, as_ballot_matrix
+
+
+def candidate_label(i):
+    """Return the letter label of candidate i: A to Z, then AA, AB, and so on."""
+    label = ""
+    i += 1
+    while i:
+        i, remainder = divmod(i - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
 
 
 class VotingMethod(ABC):
+    # Whether process_ballots can be called again, e.g. with another num_winners
+    reusable = False
+
     def __init__(self, movies, ballots, **kwargs):
         self.movies = movies
         self.ballots = ballots
         self.tie = False
         self.num_winners = kwargs.get("num_winners", 1)
+        self.group = kwargs.get("group", True)
+        # Records per-phase timings when a domain.Profiler is passed in
+        self.profiler = kwargs.get("profiler") or NULL_PROFILER
+
+    def ballot_groups(self):
+        """Return the ballots to tabulate.
+
+        Unless the method was created with group=False, identical rankings are
+        collapsed into weighted rows so tallies cost one pass per distinct ranking.
+        """
+        if not self.group:
+            return self.ballots
+        return as_ballot_matrix(self.movies, self.ballots).collapse()
 
     @abstractmethod
     def process_ballots(self):
@@ -19,6 +46,14 @@ class VotingMethod(ABC):
         """
         raise NotImplementedError("Subclass must implement process_ballots method")
 
+    def get_rounds(self):
+        """Return per-round data for round-based methods, with movies by title.
+
+        Returns:
+            list: One dict per round, empty for methods without rounds
+        """
+        return []
+
     @abstractmethod
     def get_debug(self):
         """Returns human readable debug information to validate voting results.
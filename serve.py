@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import argparse
+import threading
+from urllib.parse import parse_qs, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from elect import load_ballots
+from methods import VotingMethodFactory
+from methods.result_cache import RESULT_CACHE_DIR, ResultCache
+from domain import ParseCache, acquire_file
+from domain.parse_cache import PARSE_CACHE_DIR
+
+
+class ElectionServer:
+    """
+    Keeps the newest export and computed results in memory between queries.
+
+    A watcher thread polls the ballots directory and loads a newer export as soon
+    as it appears, so queries never wait on parsing. Results are computed once per
+    (ballots, method, num_winners) and kept in a ResultCache, so they are reused
+    across newer exports with the same responses and, with an on-disk cache,
+    across restarts.
+
+    Attributes:
+        ballots_dir (str): Directory searched for exports
+        pattern (str): Export filename prefix
+        poll_interval (float): Seconds between checks for a newer export
+    """
+
+    def __init__(self, ballots_dir, pattern="Runoff Votes", **kwargs):
+        self.ballots_dir = ballots_dir
+        self.pattern = pattern
+        self.poll_interval = kwargs.get("poll_interval", 2.0)
+        self.cache = kwargs.get("cache")
+        self.stream = kwargs.get("stream")
+        self.result_cache = kwargs.get("result_cache") or ResultCache()
+        self.lock = threading.Lock()
+        self.export = None  # (filepath, mtime_ns) of the loaded export
+        self.ballots = None
+        self.digest = None  # canonical_digest() of the loaded ballots
+        self.stopped = threading.Event()
+
+    def refresh(self):
+        """Load the newest export if it differs from the one in memory.
+
+        Returns:
+            bool: True if a new export was loaded
+        """
+        filepath = acquire_file(False, self.pattern, path=self.ballots_dir)
+        export = (filepath, os.stat(filepath).st_mtime_ns)
+        if export == self.export:
+            return False
+        _file_contents, ballots = load_ballots(filepath, self.stream, self.cache)
+        digest = ballots.canonical_digest()
+        with self.lock:
+            self.export, self.ballots, self.digest = export, ballots, digest
+        return True
+
+    def watch(self):
+        """Poll for newer exports until stop() is called."""
+        while not self.stopped.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as error:  # e.g. a half-downloaded zip; keep polling
+                print(f"Could not load export: {type(error).__name__}: {error}")
+
+    def stop(self):
+        self.stopped.set()
+
+    def query(self, method_str="schulze", num_winners=1, debug=False):
+        """Return the results of a method on the loaded export as a dict."""
+        if method_str not in VotingMethodFactory.METHODS:
+            raise ValueError(f"Unknown voting method: {method_str}")
+        with self.lock:
+            export, ballots, digest = self.export, self.ballots, self.digest
+        if ballots is None:
+            raise FileNotFoundError("No export loaded")
+        start = time.perf_counter()
+        cached = self.result_cache.tabulate(
+            ballots, method_str, num_winners=num_winners, digest=digest
+        )
+        result = {
+            "file": os.path.basename(export[0]),
+            "method": method_str,
+            "num_winners": num_winners,
+            "winners": cached["winners"],
+            "losers": cached["losers"],
+            "tie": cached["tie"],
+            "ballots": ballots.num_ballots,
+            "seconds": time.perf_counter() - start,
+        }
+        if debug:
+            result["debug"] = cached["debug"]
+        return result
+
+
+def make_handler(server):
+    class ElectionRequestHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            if url.path == "/health":
+                self._send(200, {"export": server.export and server.export[0]})
+            elif url.path == "/results":
+                try:
+                    result = server.query(
+                        params.get("method", "schulze"),
+                        int(params.get("num_winners", 1)),
+                        params.get("debug", "0") not in ("0", "false", ""),
+                    )
+                except (ValueError, FileNotFoundError) as error:
+                    self._send(400, {"error": str(error)})
+                else:
+                    self._send(200, result)
+            else:
+                self._send(404, {"error": f"Unknown path: {url.path}"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ElectionRequestHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve movie night results over HTTP from a warm process"
+    )
+    parser.add_argument("--host", help="address to listen on", default="127.0.0.1")
+    parser.add_argument(
+        "-p", "--port", help="port to listen on", type=int, default=8765
+    )
+    parser.add_argument(
+        "-i",
+        "--poll_interval",
+        help="seconds between checks for a newer export",
+        type=float,
+        default=2.0,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="parse and tabulate exports again instead of using the parse and "
+        "on-disk result caches",
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    cache = None if args.no_cache else ParseCache(os.path.join(cwd, PARSE_CACHE_DIR))
+    # Results are always kept in memory; --no-cache only skips the directory
+    result_cache = ResultCache(
+        None if args.no_cache else os.path.join(cwd, RESULT_CACHE_DIR)
+    )
+    server = ElectionServer(
+        os.path.join(cwd, "ballots"),
+        cache=cache,
+        result_cache=result_cache,
+        poll_interval=args.poll_interval,
+    )
+    server.refresh()
+    threading.Thread(target=server.watch, daemon=True).start()
+
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(server))
+    print(f"Serving results on http://{args.host}:{args.port}/results")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
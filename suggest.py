@@ -1,6 +1,9 @@
 import os
+import sys
 import argparse
-from domain.file_utils import acquire_file, parse_file
+from domain.file_utils import acquire_file, find_files, parse_file
+from domain.parse_cache import PARSE_CACHE_DIR, ParseCache
+from domain.title_index import TITLE_INDEX_FILE, TitleIndex
 
 
 class Suggest:
@@ -13,10 +16,44 @@ class Suggest:
         self.filepath = acquire_file(
             args.select, "Suggest a Movie", path=suggestions_dir
         )
-        self.file_contents = parse_file(self.filepath)
+        self.file_contents = self.load_file_contents()
         self.parse_suggestions()
+        if not args.no_index:
+            self.flag_duplicates(suggestions_dir)
         self.export()
 
+    def load_file_contents(self):
+        if self.args.no_cache:
+            return parse_file(self.filepath)
+        cache = ParseCache(os.path.join(os.getcwd(), PARSE_CACHE_DIR))
+        file_contents = cache.load_rows(self.filepath)
+        if file_contents is None:
+            file_contents = parse_file(self.filepath)
+            cache.store_rows(self.filepath, file_contents)
+        return file_contents
+
+    def flag_duplicates(self, suggestions_dir):
+        """Warn about suggestions that match titles from earlier exports."""
+        index = TitleIndex.load(os.path.join(os.getcwd(), TITLE_INDEX_FILE))
+        index.update(find_files("Suggest a Movie", path=suggestions_dir))
+        index.save()
+        current = os.path.basename(self.filepath)
+        self.duplicates = {}
+        for row in self.file_contents[1:]:
+            title, year = row[1].strip(), row[4].strip()
+            matches = index.lookup(
+                title, int(year) if year.isdigit() else None, exclude=(current,)
+            )
+            if matches:
+                self.duplicates[title] = matches
+                print(f"Possible resubmission: {title}", file=sys.stderr)
+                for similarity, match, match_year, source in matches[:3]:
+                    print(
+                        f"{' ':>8}{match} ({match_year or '?'}) in {source}"
+                        f" [{similarity:.0%} similar]",
+                        file=sys.stderr,
+                    )
+
     def export(self):
         if self.args.outfile:
             cwd = os.getcwd()
@@ -77,6 +114,16 @@ def main():
         help="save parsed ballots to a file instead of terminal",
         action="store_true",
     )
+    parser.add_argument(
+        "--no-cache",
+        help="parse the export again instead of using the parse cache",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--no-index",
+        help="skip checking suggestions against titles from earlier exports",
+        action="store_true",
+    )
     args = parser.parse_args()
     Suggest(args)
 
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from domain import BallotMatrix, read_ballot_file, write_ballot_file
+from methods import VotingMethodFactory
+
+
+def truncated_ballots(num_ballots=300, n=8, seed=7):
+    rng = random.Random(seed)
+    matrix = BallotMatrix([f"Movie {i}" for i in range(n)])
+    for _ in range(num_ballots):
+        order = rng.sample(range(n), rng.randint(1, n))
+        votes = [-1] * n
+        for rank, column in enumerate(order, 1):
+            votes[column] = rank
+        matrix.append(votes)
+    return matrix
+
+
+@pytest.mark.parametrize("method_str", ["instant", "instant-reorder", "stv"])
+@pytest.mark.parametrize("num_winners", [1, 3])
+def test_int8_ranks_match_int16(tmp_path, method_str, num_winners):
+    wide = truncated_ballots()
+    path = tmp_path / "votes.ballots"
+    write_ballot_file(str(path), wide)
+    narrow = read_ballot_file(str(path))
+    assert narrow.typecode == "b"
+
+    results = []
+    for ballots in (wide, narrow):
+        random.seed(0)  # Same draws for any random tie-breaks
+        method = VotingMethodFactory.create_method(
+            method_str, ballots.movies.copy(), ballots, num_winners=num_winners
+        )
+        results.append(method.process_ballots())
+    assert results[0] == results[1]
+    assert results[0][0]
+
+
+def test_copy_of_mapped_ranks(tmp_path):
+    wide = truncated_ballots(num_ballots=20).collapse()
+    path = tmp_path / "votes.ballots"
+    write_ballot_file(str(path), wide)
+    narrow = read_ballot_file(str(path))
+    for ballots in (wide, narrow):
+        copy = ballots.copy()
+        assert copy.typecode == ballots.typecode
+        assert list(copy.rows()) == list(ballots.rows())
+        assert copy.num_ballots == ballots.num_ballots
@@ -0,0 +1,118 @@
+import random
+import sys
+
+import pytest
+
+from domain import BallotMatrix, SparseBallots
+from methods import SchulzeMethod
+from methods.pairwise import (
+    tally_pairwise_numpy,
+    tally_pairwise_parallel,
+    tally_pairwise_python,
+    tally_pairwise_sparse_numpy,
+    tally_pairwise_sparse_python,
+)
+from methods.paths import widest_paths, widest_paths_numpy, widest_paths_python
+
+KINDS = ["complete", "truncated", "tied"]
+
+
+def random_ballots(kind, num_ballots=200, n=7, seed=0):
+    rng = random.Random(f"{kind}-{num_ballots}-{n}-{seed}")
+    matrix = BallotMatrix([f"Movie {i}" for i in range(n)])
+    for _ in range(num_ballots):
+        votes = rng.sample(range(1, n + 1), n)
+        if kind == "truncated":
+            cut = rng.randint(0, n)
+            votes = [v if v <= cut else -1 for v in votes]
+        elif kind == "tied":
+            votes = [rng.choice([-1, 1, 1, 2, 2, 3]) for _ in range(n)]
+        matrix.append(votes)
+    return matrix
+
+
+def random_matrix(n, rng):
+    d = [[0] * n for _ in range(n)]
+    voters = rng.randint(1, 30)
+    for i in range(n):
+        for j in range(i + 1, n):
+            d[i][j] = rng.randint(0, voters)
+            d[j][i] = rng.choice([voters - d[i][j], d[i][j], rng.randint(0, voters)])
+    return d
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("collapse", [False, True])
+def test_tallies_agree(kind, collapse):
+    pytest.importorskip("numpy")
+    for seed in range(5):
+        ballots = random_ballots(kind, seed=seed)
+        if collapse:
+            ballots = ballots.collapse()
+        expected = tally_pairwise_python(ballots, ballots.n)
+        sparse = SparseBallots.from_matrix(ballots)
+        assert tally_pairwise_numpy(ballots, ballots.n) == expected
+        assert tally_pairwise_numpy(ballots, ballots.n, batch_size=7) == expected
+        assert tally_pairwise_sparse_python(sparse, ballots.n) == expected
+        assert tally_pairwise_sparse_numpy(sparse, ballots.n) == expected
+        assert tally_pairwise_sparse_numpy(sparse, ballots.n, batch_size=5) == expected
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 13), reason="SharedMemory(track=False) needs 3.13"
+)
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("collapse", [False, True])
+def test_parallel_tally_agrees(kind, collapse):
+    ballots = random_ballots(kind, num_ballots=301)
+    if collapse:
+        ballots = ballots.collapse()
+    expected = tally_pairwise_python(ballots, ballots.n)
+    for vectorize in (False, None):
+        parallel = tally_pairwise_parallel(
+            ballots, ballots.n, workers=3, vectorize=vectorize
+        )
+        assert parallel == expected
+
+
+def test_widest_paths_agree():
+    pytest.importorskip("numpy")
+    rng = random.Random(4)
+    for _ in range(300):
+        d = random_matrix(rng.randint(1, 15), rng)
+        expected = widest_paths_python(d)
+        assert widest_paths_numpy(d) == expected
+        assert widest_paths(d, vectorize=True) == expected
+        assert widest_paths(d, vectorize=False) == expected
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_schulze_add_remove_round_trip(kind):
+    base = random_ballots(kind, seed=1)
+    extra = random_ballots(kind, num_ballots=60, seed=2)
+    combined = base.copy()
+    combined.extend(extra.rows())
+
+    method = SchulzeMethod(base.movies.copy(), base, num_winners=3)
+    before = method.process_ballots()
+    d_before = [row.copy() for row in method.d]
+
+    method.add_ballots(extra)
+    fresh = SchulzeMethod(base.movies.copy(), combined, num_winners=3)
+    assert method.process_ballots() == fresh.process_ballots()
+    assert method.d == fresh.d
+    assert method.p == fresh.p
+
+    method.remove_ballots(extra)
+    assert method.d == d_before
+    assert method.process_ballots() == before
+
+
+def test_schulze_remove_uncounted_ballots():
+    base = random_ballots("complete", num_ballots=5, seed=1)
+    method = SchulzeMethod(base.movies.copy(), base)
+    method.process_ballots()
+    d_before = [row.copy() for row in method.d]
+    with pytest.raises(ValueError):
+        method.remove_ballots(random_ballots("complete", num_ballots=50, seed=3))
+    assert method.d == d_before
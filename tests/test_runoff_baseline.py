@@ -0,0 +1,149 @@
+import random
+import sys
+
+import pytest
+
+from domain import BallotMatrix
+from methods import InstantRunoffMethod
+from methods.runoff_tally import RewritingRunoffTally, VectorRewritingRunoffTally
+
+
+class BaselineRunoff:
+    """The original ballot-rewriting instant runoff engine, kept as a reference."""
+
+    def __init__(self, movies, rows, num_winners, reorder):
+        self.movies = list(movies)
+        self.rows = [list(votes) for votes in rows]
+        self.columns = list(range(len(movies)))
+        self.max_vote = len(movies)
+        self.num_winners = num_winners
+        self.reorder = reorder
+        self.eliminated = []
+        self.tie = False
+
+    def _active(self, votes):
+        return [votes[c] for c in self.columns]
+
+    def count(self, vote_num, index):
+        return sum(votes[self.columns[index]] == vote_num for votes in self.rows)
+
+    def shift(self, index):
+        for votes in self.rows:
+            if votes[self.columns[index]] == 1:
+                active = self._active(votes)
+                following = min((v for v in active if v > 1), default=sys.maxsize)
+                # The original raised ValueError here for exhausted ballots
+                votes[self.columns[active.index(following)]] = 1
+        self.columns.pop(index)
+        self.movies.pop(index)
+
+    def reorder_rows(self):
+        for votes in self.rows:
+            active = self._active(votes)
+            for i, v in enumerate(sorted(active)):
+                active[active.index(v)] = i + 1
+            for c, v in zip(self.columns, active):
+                votes[c] = v
+
+    def remove(self, index):
+        self.shift(index)
+        if self.reorder:
+            self.max_vote -= 1
+            self.reorder_rows()
+
+    def lowest(self, indices, vote):
+        counts = {i: self.count(vote, i) for i in indices}
+        low = min(counts.values())
+        return [i for i, c in counts.items() if c == low]
+
+    def run(self):
+        s, e = 0, len(self.movies)
+        while s < e:
+            if self.count(1, s) == 0:
+                self.remove(s)
+                e -= 1
+            else:
+                s += 1
+        while len(self.movies) > self.num_winners:
+            indices = list(range(len(self.movies)))
+            for vote in range(1, self.max_vote + 1):
+                indices = self.lowest(indices, vote)
+                if len(indices) == 1:
+                    self.eliminated.insert(0, self.movies[indices[0]])
+                    self.remove(indices[0])
+                    break
+                if vote == self.max_vote:
+                    self.tie = True
+                    tied = [self.movies[i] for i in indices]
+                    if len(self.movies) == self.num_winners + len(indices) - 1:
+                        return self.movies[:-1] + [tied], self.eliminated
+                    keep = random.randint(0, len(indices) - 1)
+                    for i, index in enumerate(indices):
+                        if i != keep:
+                            self.eliminated.insert(0, self.movies[index])
+                    self.remove(indices[keep])
+        return self.movies, self.eliminated
+
+
+def profiles(kind, count=300, seed=11):
+    rng = random.Random(seed)
+    for _ in range(count):
+        n = rng.randint(1, 7)
+        rows = []
+        for _ in range(rng.randint(1, 30)):
+            votes = rng.sample(range(1, n + 1), n)
+            if kind == "truncated" and n > 1:
+                cut = rng.randint(1, n)
+                votes = [v if v <= cut else -1 for v in votes]
+            elif kind == "tied":
+                votes = [rng.choice([-1, 1, 1, 2, 2, 3]) for _ in range(n)]
+            rows.append(votes)
+        yield n, rows, rng.randint(1, max(1, n - 1))
+
+
+@pytest.mark.parametrize("kind", ["complete", "truncated", "tied"])
+@pytest.mark.parametrize("reorder", [False, True])
+@pytest.mark.parametrize("group", [True, False])
+def test_matches_baseline(kind, reorder, group):
+    compared = 0
+    for trial, (n, rows, num_winners) in enumerate(profiles(kind)):
+        movies = [f"Movie {i}" for i in range(n)]
+        random.seed(trial)
+        try:
+            expected = BaselineRunoff(movies, rows, num_winners, reorder).run()
+        except ValueError:
+            continue  # The baseline could not count exhausted ballots
+        ballots = BallotMatrix(movies)
+        ballots.extend(rows)
+        random.seed(trial)
+        method = InstantRunoffMethod(
+            movies, ballots, num_winners=num_winners, reorder=reorder, group=group
+        )
+        assert method.process_ballots() == expected
+        compared += 1
+    assert compared > 60
+
+
+def test_vector_rewriting_matches_python():
+    pytest.importorskip("numpy")
+    rng = random.Random(5)
+    for _ in range(300):
+        n = rng.randint(1, 7)
+        ballots = BallotMatrix([f"Movie {i}" for i in range(n)])
+        for _ in range(rng.randint(1, 12)):
+            ballots.append([rng.choice([-1, -1, 0, 1, 1, 2, 3, 5]) for _ in range(n)])
+        tallies = [RewritingRunoffTally(ballots), VectorRewritingRunoffTally(ballots)]
+        remaining = list(range(n))
+        rng.shuffle(remaining)
+        while remaining:
+            counts = [
+                [[t.count(v, c) for c in remaining] for v in range(1, n + 2)]
+                for t in tallies
+            ]
+            assert counts[0] == counts[1]
+            col = remaining.pop()
+            densify = rng.random() < 0.4
+            for tally in tallies:
+                tally.remove(col)
+                if densify:
+                    tally.densify()
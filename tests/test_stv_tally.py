@@ -0,0 +1,36 @@
+import random
+from array import array
+from fractions import Fraction
+
+import pytest
+
+from domain import BallotMatrix
+from methods.stv_tally import TransferTally, VectorTransferTally
+
+
+def test_vector_tally_matches_python():
+    pytest.importorskip("numpy")
+    rng = random.Random(3)
+    for _ in range(200):
+        n = rng.randint(1, 8)
+        ballots = BallotMatrix([f"Movie {i}" for i in range(n)])
+        for _ in range(rng.randint(1, 40)):
+            votes = rng.sample(range(1, n + 1), n)
+            cut = rng.randint(0, n)
+            ballots.append([v if v <= cut else -1 for v in votes])
+        weights = array("q", (rng.randint(1, 5) for _ in range(len(ballots))))
+        ballots = BallotMatrix(ballots.movies, ballots.ranks, weights)
+        tallies = [TransferTally(ballots), VectorTransferTally(ballots)]
+        assert tallies[0].valid == tallies[1].valid
+        remaining = list(range(n))
+        rng.shuffle(remaining)
+        while remaining:
+            col = remaining.pop()
+            total = tallies[0].totals[col]
+            factor = 1
+            if total and rng.random() < 0.5:
+                factor = Fraction(total - min(total, rng.randint(1, 10))) / total
+            for tally in tallies:
+                tally.transfer(col, factor)
+            assert tallies[0].totals == tallies[1].totals
+            assert tallies[0].exhausted == tallies[1].exhausted